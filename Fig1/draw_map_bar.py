@@ -1,77 +1,85 @@
-import geopandas as gpd
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import matplotlib as mpl
 import numpy as np
-import pandas as pd
 from matplotlib.colors import LogNorm
 from shapely.geometry import box
 
+from pvplot.basemap import draw_basemap
+from pvplot.data import BBOX_FIG1, SOLAR_BBOX, load_world
+from pvplot.export import save_figure
+from pvplot.hexbin import cached_aggregate, draw_hexbins
+from pvplot.insets import draw_inset_bars, stacked_bars, top_n
+from pvplot.lazy import lazy_import
+from pvplot.levels import SOLAR_LEVELS, load_for_figure
+from pvplot.parallel import run_jobs
+from pvplot.profiling import pipeline, stage, timed
+from pvplot.raster import figure_pixels
+from pvplot.shared import attach, published, table_arrays
+from pvplot.spec import MM_TO_INCH, compile_figure
+from pvplot.stream import (CHUNK_SIZE, fields, histogram_percentile, iter_chunks, positive_filter,
+                           projected_extent, stream_hexbin)
+from pvplot.tables import read_sheet
+from pvplot.tiles import SCHEMES, level_from_points, level_values, load_scheme_layer, pyramid
+
+# 重量级依赖在首次使用时才导入 (main.py list / 增量构建检查只读取本模块的参数)
+gpd = lazy_import("geopandas")
+pd = lazy_import("pandas")
+plt = lazy_import("matplotlib.pyplot")
+
 # ================= 1. Nature 出版级全局设置 =================
+# 尺寸、字体与配色见 figures.toml 的 figures.fig1, 导入时编译一次
+STYLE = compile_figure("fig1")
 # 尺寸转换 (mm -> inch)
-mm_to_inch = 1 / 25.4
-nature_width_mm = 150
-fig_width = nature_width_mm * mm_to_inch
-# 宽高比：Robinson 投影通常宽:高约 2:1，考虑到柱状图空间，设为 0.6
-fig_height = fig_width * 0.45 
-
-# 字体设置 (严苛模式)
-mpl.rcParams['font.family'] = 'sans-serif'
-mpl.rcParams['font.sans-serif'] = ['Arial'] # 强制 Arial
-mpl.rcParams['font.size'] = 6               # 基准字号 6pt
-mpl.rcParams['axes.linewidth'] = 0.5        # 边框线宽 0.5pt (符合 Nature 细线要求)
-mpl.rcParams['xtick.major.width'] = 0.5
-mpl.rcParams['ytick.major.width'] = 0.5
-mpl.rcParams['xtick.labelsize'] = 6
-mpl.rcParams['ytick.labelsize'] = 6
-mpl.rcParams['legend.fontsize'] = 6
-mpl.rcParams['pdf.fonttype'] = 42           # 保证文本可编辑 (非轮廓)
+mm_to_inch = MM_TO_INCH
+nature_width_mm = STYLE.width_mm
+# 宽高比：Robinson 投影通常宽:高约 2:1，考虑到柱状图空间，设为 0.45
+fig_width, fig_height = STYLE.figsize
+
+# 字体设置 (严苛模式), 在 render() 内通过 rc_context 生效, 不污染其他图
+NATURE_RC = STYLE.rc
 
 # ================= 2. 核心参数 =================
 world_shp = "data/map/世界国家地图.shp"
 solar_shp = r"data/10km/Solar_10km.shp"
+# 网格级别: "auto" 按图宽与 DPI 选择 (见 pvplot.levels), 或指定 km (1 / 5 / 10 / 20 / 50 / 100)
+solar_level = "auto"
+solar_sources = {**SOLAR_LEVELS, 10: solar_shp}
 excel_path = r"Fig1/excel/barchartFig1.xlsx"
 # 绘图模式: "分布式" / "集中式" / "总量"
-PVtype = "分布式"   
+PVtype = "分布式"
+PV_TYPES = ["分布式", "集中式", "总量"]
+# 批量模式的输出格式
+FORMATS = ["pdf", "svg", "png"]
 plot_map_bundary= False
-grid_size = 400  
+# 世界底图样式与绘制方式 ("vector" 缓存多边形路径 / "raster" 缓存预渲染栅格, 见 pvplot.basemap)
+BASEMAP_STYLE = {"facecolor": "#e0e0e0", "edgecolor": "white", "linewidth": 0.3}
+basemap_mode = "vector"
+grid_size = 400
 target_crs = "ESRI:54030" # Robinson 投影
 
 # --- 颜色定义 (Colorblind friendly where possible) ---
-color_dist = "#F4A582"  # 分布式 (暖橙)
-color_util = "#92C5DE"  # 集中式 (冷蓝)
-color_single = "#41b6c4" 
+color_dist = STYLE.named_colors["distributed"]  # 分布式 (暖橙)
+color_util = STYLE.named_colors["utility"]      # 集中式 (冷蓝)
+color_single = STYLE.named_colors["single"]
 
 # --- 关键：统计图布局坐标 (Left, Bottom, Width, Height) ---
-# 坐标系为 Figure 坐标 (0~1)，针对 Robinson 投影的空白区域进行了微调
-chart_positions = {
-    # 北美：左上角 (太平洋东北部)
-    "North America": [0.08, 0.60, 0.12, 0.23],
-    # 南美：左下角 (太平洋东南部)
-    "South America": [0.19, 0.28, 0.12, 0.18],
-    # 欧洲：中上方 (北大西洋)
-    "Europe":        [0.36, 0.68, 0.12, 0.18],
-    # 非洲：中下方 (南大西洋或几内亚湾)
-    "Africa":        [0.43, 0.25, 0.12, 0.18],
-    # 亚洲：右上角 (俄罗斯/北太平洋)
-    "Asia":          [0.85, 0.65, 0.12, 0.23],
-    # 大洋洲：右下角 (南太平洋)
-    "Oceania":       [0.68, 0.21, 0.10, 0.23]
-}
+# 坐标系为 Figure 坐标 (0~1)，针对 Robinson 投影的空白区域进行了微调 (见 figures.fig1.layout)
+chart_positions = dict(STYLE.layout)
+
+# 每个区域柱状图显示的国家数
+chart_top_n = 5
 
 # ================= 3. 数据处理 =================
-print("正在读取并处理数据...")
 
 # A. 读取 Excel 并清洗
+@timed()
 def load_chart_data(path, pv_type):
-    xls = pd.ExcelFile(path)
-    df_dist = pd.read_excel(xls, 'DistributedPV-GW')
-    df_util = pd.read_excel(xls, 'Utility-scalePV-GW')
-    
-    # 列名标准化
-    for df in [df_dist, df_util]:
-        df.columns = [c.strip().capitalize() for c in df.columns] 
-        df['Nation'] = df['Nation'].str.title() # 巴西: BRAZIL -> Brazil
+    # 工作簿只解析一次, 列名标准化 (strip/capitalize, BRAZIL -> Brazil) 在转换时完成, 之后读 Parquet 缓存
+    df_dist = read_sheet(path, 'DistributedPV-GW', normalize="nation")
+    df_util = read_sheet(path, 'Utility-scalePV-GW', normalize="nation")
 
     if pv_type == "总量":
         # 合并用于堆叠图
@@ -87,178 +95,259 @@ def load_chart_data(path, pv_type):
         df_util['Value'] = df_util['Value']
         return df_util.sort_values('Value', ascending=False), False
 
-chart_df, is_stacked = load_chart_data(excel_path, PVtype)
-
-# B. 读取矢量地图
-world_map = gpd.read_file(world_shp)
-gdf = gpd.read_file(solar_shp)
-gdf.columns = [c.lower() for c in gdf.columns]
-
 # C. 字段匹配
 field_map = {
     "集中式": ["jizhong_area", "jizhong_ar", "jizhong"],
     "分布式": ["fenbu_area", "fenbu"],
     "总量":   ["total_area", "total"]
 }
-candidates = field_map.get(PVtype, [])
-value_field = next((f for f in candidates if f in gdf.columns), None)
-if not value_field: raise ValueError(f"字段未找到: {candidates}")
-
-output_filename = f"Nature_Global_{PVtype}_Final.pdf"
-
-# D. 投影处理 (修复 180度横线问题 + 椭圆计算)
-bbox = box(-180, -58, 180, 90) # 移除了 -90 到 -58 之间的南极区域
-world_map = world_map.clip(bbox).to_crs(target_crs)
 
-# 提取光伏质心并投影
-gdf = gdf[gdf[value_field] > 0].copy()
-gdf_proj = gdf.to_crs(target_crs)
-gdf_points = gdf_proj.copy()
-gdf_points['geometry'] = gdf_proj.geometry.centroid
+def resolve_value_field(gdf, pv_type):
+    candidates = field_map.get(pv_type, [])
+    value_field = next((f for f in candidates if f in gdf.columns), None)
+    if not value_field: raise ValueError(f"字段未找到: {candidates}")
+    return value_field
 
-x = gdf_points.geometry.x
-y = gdf_points.geometry.y
-C = gdf_points[value_field]
+def output_name(pv_type, fmt="pdf"):
+    return f"Nature_Global_{pv_type}_Final.{fmt}"
 
 # ================= 4. 绘图主程序 =================
-fig = plt.figure(figsize=(fig_width, fig_height)) # 严格设定 180mm 宽
-
-# 主地图轴 (稍微留边给 Colorbar)
-ax_map = fig.add_axes([0.01, 0.05, 0.98, 0.94]) 
-
-# ================= 修正后的 Section A =================
-# --- A. 绘制背景（椭圆边界）---
-if plot_map_bundary:
-    # 1. 创建基础的全球矩形（WGS84）
-    geometry = box(-180, -90, 180, 90)
-    boundary = gpd.GeoDataFrame(geometry=[geometry], crs="EPSG:4326")
-
-    # 2. 【关键步骤】致密化（Segmentize）
-    # 在投影前，每隔 1 度加一个点。
-    # 只有加了足够多的点，投影后的边缘才会呈现出圆滑的弧度。
-    # 注意：segmentize 需要 geopandas >= 0.13.0
-    if hasattr(boundary, "segmentize"):
-        boundary = boundary.segmentize(max_segment_length=1.0)
-    else:
-        # 兼容旧版本 GeoPandas 的写法 (手动插值)
-        from shapely.geometry import Polygon, LineString
-        import numpy as np
-        
-        # 手动生成高密度的点围成一圈
-        lons = np.concatenate([
-            np.linspace(-180, 180, 181),       # 下边缘
-            np.linspace(180, 180, 91),         # 右边缘
-            np.linspace(180, -180, 181),       # 上边缘
-            np.linspace(-180, -180, 91)        # 左边缘
-        ])
-        lats = np.concatenate([
-            np.linspace(-90, -90, 181),        # 下边缘
-            np.linspace(-90, 90, 91),          # 右边缘
-            np.linspace(90, 90, 181),          # 上边缘
-            np.linspace(90, -90, 91)           # 左边缘
-        ])
-        boundary = gpd.GeoDataFrame(
-            geometry=[Polygon(zip(lons, lats))], 
-            crs="EPSG:4326"
+@pipeline("fig1")
+def render(world_map, gdf, pv_type=PVtype, output_filename=None, chart_path=excel_path, chart=None,
+           binned=None):
+    """
+    绘制单个 PVtype 的全球六边形热力图 + 区域柱状图
+    world_map / gdf 为 pvplot.data 加载的已投影图层 (可在多张图之间共享)
+    chart 为预先解析的 load_chart_data 结果, 为空时读取 chart_path
+    binned 为 stream_bins 的结果 (流式分箱), 给出时不使用 gdf
+    """
+    if output_filename is None:
+        output_filename = output_name(pv_type)
+    chart_df, is_stacked = chart if chart is not None else load_chart_data(chart_path, pv_type)
+    if binned is None:
+        value_field = resolve_value_field(gdf, pv_type)
+
+        # D. 光伏质心 (投影后的质心已在缓存中预先计算); gdf 也可以是 pvplot.shared.attach 的只读列
+        values = np.asarray(gdf[value_field], float)
+        keep = values > 0
+
+        x = np.asarray(gdf['cx'])[keep]
+        y = np.asarray(gdf['cy'])[keep]
+        C = values[keep]
+
+    with mpl.rc_context(NATURE_RC):
+        fig = plt.figure(figsize=(fig_width, fig_height)) # 严格设定 180mm 宽
+
+        # 主地图轴 (稍微留边给 Colorbar)
+        ax_map = fig.add_axes([0.01, 0.05, 0.98, 0.94])
+
+        # ================= 修正后的 Section A =================
+        # --- A. 绘制背景（椭圆边界）---
+        if plot_map_bundary:
+            # 1. 创建基础的全球矩形（WGS84）
+            geometry = box(-180, -90, 180, 90)
+            boundary = gpd.GeoDataFrame(geometry=[geometry], crs="EPSG:4326")
+
+            # 2. 【关键步骤】致密化（Segmentize）
+            # 在投影前，每隔 1 度加一个点。
+            # 只有加了足够多的点，投影后的边缘才会呈现出圆滑的弧度。
+            # 注意：segmentize 需要 geopandas >= 0.13.0
+            if hasattr(boundary, "segmentize"):
+                boundary = boundary.segmentize(max_segment_length=1.0)
+            else:
+                # 兼容旧版本 GeoPandas 的写法 (手动插值)
+                from shapely.geometry import Polygon, LineString
+
+                # 手动生成高密度的点围成一圈
+                lons = np.concatenate([
+                    np.linspace(-180, 180, 181),       # 下边缘
+                    np.linspace(180, 180, 91),         # 右边缘
+                    np.linspace(180, -180, 181),       # 上边缘
+                    np.linspace(-180, -180, 91)        # 左边缘
+                ])
+                lats = np.concatenate([
+                    np.linspace(-90, -90, 181),        # 下边缘
+                    np.linspace(-90, 90, 91),          # 右边缘
+                    np.linspace(90, 90, 181),          # 上边缘
+                    np.linspace(90, -90, 91)           # 左边缘
+                ])
+                boundary = gpd.GeoDataFrame(
+                    geometry=[Polygon(zip(lons, lats))],
+                    crs="EPSG:4326"
+                )
+
+            # 3. 投影转换
+            boundary = boundary.to_crs(target_crs)
+
+            # 4. 绘图
+            # 绘制浅灰色背景填充
+            boundary.plot(ax=ax_map, facecolor="#f0f0f0", edgecolor="none", zorder=0)
+            # 绘制深灰色边界线（盖在最上面）
+            boundary.plot(ax=ax_map, facecolor="none", edgecolor="#404040", linewidth=0.1, zorder=3)
+
+
+
+        # --- Step 2: 世界底图 ---
+        draw_basemap(ax_map, world_map, BASEMAP_STYLE, basemap_mode, zorder=1,
+                     width_px=figure_pixels(nature_width_mm, 300))
+
+        # --- Step 3: 六边形热力图 ---
+        if binned is None:
+            # 分箱结果按 (图层, 字段, grid_size) 缓存, 调整色标时不再重新聚合
+            data_key = gdf.attrs.get("cache_key")
+            with stage("aggregate"):
+                bins = cached_aggregate((data_key, value_field) if data_key else None, x, y, C,
+                                        gridsize=grid_size, mincnt=1)
+            # 动态计算 Vmax (避免单个超大值导致整体颜色过浅)
+            vmin_val, vmax_val = np.nanpercentile(C, 5), np.nanpercentile(C, 99) * 5
+        else:
+            bins, vmin_val, vmax_val = binned
+        hb = draw_hexbins(
+            ax_map, bins, cmap="YlOrRd",
+            norm=LogNorm(vmin=vmin_val, vmax=vmax_val),
+            linewidths=0, zorder=2
         )
-
-    # 3. 投影转换
-    boundary = boundary.to_crs(target_crs)
-
-    # 4. 绘图
-    # 绘制浅灰色背景填充
-    boundary.plot(ax=ax_map, facecolor="#f0f0f0", edgecolor="none", zorder=0)
-    # 绘制深灰色边界线（盖在最上面）
-    boundary.plot(ax=ax_map, facecolor="none", edgecolor="#404040", linewidth=0.1, zorder=3)
-
-
-
-# --- Step 2: 世界底图 ---
-world_map.plot(ax=ax_map, facecolor="#e0e0e0", edgecolor="white", linewidth=0.3, zorder=1)
-
-# --- Step 3: 六边形热力图 ---
-# 动态计算 Vmax (避免单个超大值导致整体颜色过浅)
-vmax_val = np.nanpercentile(C, 99) * 5 
-hb = ax_map.hexbin(
-    x, y, C=C, gridsize=grid_size, cmap="YlOrRd",
-    norm=LogNorm(vmin=np.nanpercentile(C, 5), vmax=vmax_val),
-    reduce_C_function=np.sum, linewidths=0, mincnt=1, zorder=2
-)
-ax_map.set_axis_off()
-
-# --- Step 4: 添加统计柱状图 (悬浮在对应位置) ---
-print("正在绘制叠加图表...")
-for region, pos in chart_positions.items():
-    # 数据筛选 (取前5)
-    reg_data = chart_df[chart_df['Region'] == region].head(5)
-    if reg_data.empty: continue
-    
-    # 建立子图坐标系
-    ax_sub = fig.add_axes(pos)
-    
-    nations = reg_data['Nation'].tolist()
-    x_pos = np.arange(len(nations))
-    
-    if is_stacked:
-        v_u = reg_data['Value_util'].values
-        v_d = reg_data['Value_dist'].values
-        ax_sub.bar(x_pos, v_u, color=color_util, width=0.7, label='Utility-scale')
-        ax_sub.bar(x_pos, v_d, bottom=v_u, color=color_dist, width=0.7, label='Distributed')
-        max_h = max(v_u + v_d)
+        ax_map.set_axis_off()
+
+        # --- Step 4: 添加统计柱状图 (悬浮在对应位置) ---
+        print("正在绘制叠加图表...")
+        # 各区域前 chart_top_n 个国家一次取出, 柱子几何一次算好, 每个插图一个 PolyCollection
+        if is_stacked:
+            top = top_n(chart_df, 'Value_total', chart_top_n, chart_positions)
+            insets = stacked_bars(top, ['Value_util', 'Value_dist'], [color_util, color_dist])
+        else:
+            top = top_n(chart_df, 'Value', chart_top_n, chart_positions)
+            insets = stacked_bars(top, ['Value'], [color_single])
+        for region, pos in chart_positions.items():
+            if region not in insets: continue
+
+            # 建立子图坐标系
+            ax_sub = fig.add_axes(pos)
+            # 柱子 + 国家名 (统一放在柱子底部上方一点，垂直显示), 顶部留空写字
+            draw_inset_bars(ax_sub, insets[region])
+
+            # --- 精细化调整样式 (Nature Style) ---
+            ax_sub.set_title(region, fontsize=7, fontweight='bold', pad=3)
+
+            # 隐藏边框，只保留左轴
+            ax_sub.spines['top'].set_visible(False)
+            ax_sub.spines['right'].set_visible(False)
+
+            # X轴完全隐藏
+            ax_sub.set_xticks([])
+            # 设置ax background color
+            # ax_sub.set_facecolor('lightgray')
+            ax_sub.set_facecolor('none')
+            # Y轴刻度设置
+            ax_sub.tick_params(axis='y', labelsize=5, width=0.5, length=2, pad=1)
+
+        # --- Step 5: 全局组件 ---
+
+        # 色标 (放在底部正中)
+        cax = fig.add_axes([0.35, 0.1, 0.3, 0.015])
+        cb = plt.colorbar(hb, cax=cax, orientation="horizontal")
+        cb.set_label("Solar PV Area (km$^2$)", fontsize=6)
+        cb.ax.tick_params(labelsize=6, length=2, width=0.5)
+
+        # 图例 (仅总量模式需要)
+        if is_stacked:
+            import matplotlib.patches as mpatches
+            p1 = mpatches.Patch(color=color_dist, label='Distributed')
+            p2 = mpatches.Patch(color=color_util, label='Utility-scale')
+            # 放在左下角或合适位置
+            fig.legend(handles=[p1, p2], loc='lower left', bbox_to_anchor=(0.02, 0.05),
+                       fontsize=6, frameon=False, ncol=1, title="PV Type", title_fontsize=6)
+
+        # ================= 5. 保存输出 =================
+        print(f"输出文件: {output_filename}")
+        # Nature 要求 300-600 dpi
+        with stage("savefig"):
+            save_figure(fig, output_filename, dpi=300, bbox_inches='tight', pad_inches=0.05)
+        # plt.savefig(output_filename.replace(".pdf", ".svg"), dpi=300, bbox_inches='tight')
+        plt.close(fig)
+    return output_filename
+
+
+@timed()
+def load_layers(solar=True):
+    """读取 (或从缓存加载) Fig1 所需的已投影图层; solar=False 时只加载底图 (流式分箱时使用)"""
+    # 移除了 -90 到 -58 之间的南极区域, 修复 180度横线问题
+    world_map = load_world(BBOX_FIG1, target_crs, shp_path=world_shp)
+    # 六边形图只用质心: 点图层, 多边形不投影 (见 pvplot.data.load_points)
+    gdf = load_for_figure(nature_width_mm, 300, SOLAR_BBOX, target_crs, level=solar_level, points=True,
+                          sources=solar_sources) if solar else None
+    return world_map, gdf
+
+
+# ================= 流式分箱 (超大网格) =================
+@timed()
+def stream_bins(pv_type, bbox=SOLAR_BBOX, chunk_size=CHUNK_SIZE):
+    """
+    分块读取 solar_shp, 只读该 PVtype 的字段且在读取时过滤掉 <= 0 的网格, 逐批累加六边形分箱;
+    返回 render(binned=...) 需要的 (HexBins, vmin, vmax)。
+    分箱范围取 bbox 的投影范围, 色标分位数由对数直方图近似
+    """
+    value_field = next((f for f in field_map[pv_type] if f in fields(solar_shp)), None)
+    if not value_field: raise ValueError(f"字段未找到: {field_map[pv_type]}")
+    chunks = iter_chunks(solar_shp, [value_field], bbox=bbox, where=positive_filter(value_field),
+                         target_crs=target_crs, chunk_size=chunk_size)
+    bins, hist = stream_hexbin(chunks, value_field, grid_size, projected_extent(bbox, target_crs))
+    return bins, histogram_percentile(hist, 5), histogram_percentile(hist, 99) * 5
+
+
+# ================= 瓦片导出 =================
+def tile_layers(pv_types=PV_TYPES, scheme="robinson", max_zoom=4, min_zoom=0):
+    """
+    z/x/y 瓦片用的图层: 每种 PVtype 的光伏面积密度 (km² / km²), 配色与六边形图一致
+    返回 pvplot.tiles.export_tiles 需要的 {名称: spec}
+    """
+    gdf = load_scheme_layer(scheme, shp_path=solar_shp, points=True)
+    half = SCHEMES[scheme][1]
+    layers = {}
+    for pv_type in pv_types:
+        value_field = resolve_value_field(gdf, pv_type)
+        top = level_from_points(gdf["cx"].values, gdf["cy"].values, gdf[value_field].values, max_zoom, half)
+        density = level_values(top, "density")
+        density = density[density > 0]
+        # 色标范围按最高级别的密度分布确定, 各级共用
+        norm = LogNorm(vmin=np.nanpercentile(density, 5), vmax=np.nanpercentile(density, 99) * 5)
+        layers[f"fig1_{value_field}"] = {
+            "levels": pyramid(top, min_zoom), "how": "density",
+            "cmap": plt.get_cmap("YlOrRd"), "norm": norm,
+        }
+    return layers
+
+
+# ================= 6. 批量模式 (PVtype × 格式) =================
+def _render_job(shared, job):
+    pv_type, fmt = job
+    return render(shared["world_map"], attach(shared["points"]), pv_type,
+                  output_name(pv_type, fmt), chart=shared["charts"][pv_type])
+
+
+def render_batch(world_map, gdf, pv_types=PV_TYPES, formats=FORMATS, workers=None, chart_path=excel_path,
+                 jobs=None):
+    """
+    在进程池中渲染所有 PVtype × 格式 组合 (或显式给出的 jobs 列表)
+    图层与 Excel 只在父进程解析一次; 质心与各 PVtype 的数值列发布为共享内存映射 (pvplot.shared),
+    子进程只读映射, 其余小对象通过 fork 写时复制共享
+    """
+    if jobs is None:
+        jobs = [(pv_type, fmt) for pv_type in pv_types for fmt in formats]
+    types = list(dict.fromkeys(job[0] for job in jobs))
+    charts = {pv_type: load_chart_data(chart_path, pv_type) for pv_type in types}
+    columns = ["cx", "cy"] + [resolve_value_field(gdf, pv_type) for pv_type in types]
+    with published(table_arrays(gdf, columns), attrs={"cache_key": gdf.attrs.get("cache_key")}) as points:
+        shared = {"world_map": world_map, "points": points, "charts": charts}
+        return run_jobs(_render_job, jobs, shared, workers=workers,
+                        label=lambda job: f"{job[0]}/{job[1]}")
+
+
+if __name__ == "__main__":
+    print("正在读取并处理数据...")
+    world_map, gdf = load_layers()
+    if "--batch" in sys.argv:
+        render_batch(world_map, gdf)
     else:
-        v = reg_data['Value'].values
-        ax_sub.bar(x_pos, v, color=color_single, width=0.7)
-        max_h = max(v)
-
-    # --- 精细化调整样式 (Nature Style) ---
-    ax_sub.set_title(region, fontsize=7, fontweight='bold', pad=3)
-    ax_sub.set_xlim(-0.6, len(nations)-0.4)
-    ax_sub.set_ylim(0, max_h * 1.25) # 顶部留空写字
-    
-    # 隐藏边框，只保留左轴
-    ax_sub.spines['top'].set_visible(False)
-    ax_sub.spines['right'].set_visible(False)
-    # ax_sub.spines['bottom'].set_visible(False)
-    # ax_sub.spines['left'].set_linewidth(0.5)
-
-    
-    
-    # X轴完全隐藏
-    ax_sub.set_xticks([])
-    # 设置ax background color
-    # ax_sub.set_facecolor('lightgray')
-    ax_sub.set_facecolor('none')
-    # Y轴刻度设置
-    ax_sub.tick_params(axis='y', labelsize=5, width=0.5, length=2, pad=1)
-    
-    # 标注国家名 (放在柱子上方或内部)
-    for i, nation in enumerate(nations):
-        # 统一放在柱子底部上方一点，垂直显示
-        label_y = max_h * 0.05
-        ax_sub.text(i, label_y, nation, rotation=90, 
-                   ha='center', va='bottom', fontsize=5.5, zorder=5)
-
-# --- Step 5: 全局组件 ---
-
-# 色标 (放在底部正中)
-cax = fig.add_axes([0.35, 0.1, 0.3, 0.015])
-cb = plt.colorbar(hb, cax=cax, orientation="horizontal")
-cb.set_label("Solar PV Area (km$^2$)", fontsize=6)
-cb.ax.tick_params(labelsize=6, length=2, width=0.5)
-
-# 图例 (仅总量模式需要)
-if is_stacked:
-    import matplotlib.patches as mpatches
-    p1 = mpatches.Patch(color=color_dist, label='Distributed')
-    p2 = mpatches.Patch(color=color_util, label='Utility-scale')
-    # 放在左下角或合适位置
-    fig.legend(handles=[p1, p2], loc='lower left', bbox_to_anchor=(0.02, 0.05),
-               fontsize=6, frameon=False, ncol=1, title="PV Type", title_fontsize=6)
-
-# ================= 5. 保存输出 =================
-print(f"输出文件: {output_filename}")
-# Nature 要求 300-600 dpi
-plt.savefig(output_filename, dpi=300, bbox_inches='tight', pad_inches=0.05)
-# plt.savefig(output_filename.replace(".pdf", ".svg"), dpi=300, bbox_inches='tight')
-plt.close()
-print("绘图完成！")
+        render(world_map, gdf, PVtype)
+    print("绘图完成！")
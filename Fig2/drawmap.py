@@ -1,168 +1,356 @@
-import geopandas as gpd
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import matplotlib.colors as mcolors
 import numpy as np
-import sys
-from shapely.geometry import box
 import matplotlib as mpl
-import sys
 
-from matplotlib.colorbar import ColorbarBase
-mm_to_inch = 1 / 25.4
-nature_double_col_width = 180 * mm_to_inch
+from pvplot.basemap import draw_basemap
+from pvplot.data import BBOX_FIG2, NUMERIC_FIELDS, SOLAR_BBOX, TARGET_CRS, load_world
+from pvplot.export import save_figure
+from pvplot.lazy import lazy_import
+from pvplot.classify import cached_classes, classify, field_key, marker_handles, userdefined_labels
+from pvplot.raster import cached_index, draw_classes, figure_pixels, take
+from pvplot.levels import SOLAR_LEVELS, load_for_figure, load_level, select_level
+from pvplot.parallel import run_jobs
+from pvplot.profiling import pipeline, stage, timed
+from pvplot.regional import bbox_region, country_region, prepare, region_extent, region_layers, region_width_m
+from pvplot.shared import attach_layers, published_layers
+from pvplot.spec import MM_TO_INCH, compile_figure, variant_names
+from pvplot.stream import CHUNK_SIZE, ThinnedPoints, iter_chunks, positive_filter, projected_extent, stream_raster, stream_thin
+from pvplot.thinning import thin_points
+from pvplot.tiles import (SCHEMES, level_from_points, level_from_polygons, level_values,
+                          load_scheme_layer, pyramid)
+
+# 重量级依赖在首次使用时才导入 (main.py list / 增量构建检查只读取本模块的参数)
+plt = lazy_import("matplotlib.pyplot")
+
+# 尺寸、rcParams 与分级配色见 figures.toml (figures.fig2), 导入时编译一次
+STYLE = compile_figure("fig2")
+mm_to_inch = MM_TO_INCH
+nature_double_col_width = STYLE.width_mm * mm_to_inch
 
-mpl.rcParams['font.family'] = 'sans-serif'
-mpl.rcParams['font.sans-serif'] = ['Arial', 'Helvetica', 'DejaVu Sans']
-mpl.rcParams['ps.fonttype'] = 42
-mpl.rcParams['pdf.fonttype'] = 42
-mpl.rcParams['text.usetex'] = False
-mpl.rcParams['font.size'] = 6
-mpl.rcParams['axes.linewidth'] = 0.5
+# 在 render() 内通过 rc_context 生效, 不污染同进程内的其他图
+NATURE_RC = STYLE.rc
 
 # 1. File Paths
 solar_path = r"data/10km/Solar_10km.shp"
+# 网格级别: "auto" 按图宽与 raster_dpi 选择 (见 pvplot.levels), 或指定 km
+solar_level = "auto"
+solar_sources = {**SOLAR_LEVELS, 10: solar_path}
 world_path = "data/map/世界国家地图.shp"
+output_path = 'exported_plots/solar_visualization_fixed.pdf'
+# 区域图 (国家 / 经纬度范围) 的输出目录与单幅宽度 (mm)
+region_dir = 'exported_plots/regions'
+region_width_mm = 60
+target_crs = TARGET_CRS
+# 光照强度栅格的分辨率 (与保存 DPI 一致)
+raster_dpi = 300
+# 世界底图样式与绘制方式 ("vector" / "raster", 见 pvplot.basemap)
+BASEMAP_STYLE = {"facecolor": "#FFF", "edgecolor": "#bbbbbb", "linewidth": 0.3}
+basemap_mode = "vector"
 
-# 2. Load Data
-print("Loading data...")
-solar_gdf = gpd.read_file(solar_path)
-world_gdf = gpd.read_file(world_path)
-target_crs = "ESRI:54030" 
-# D. 投影处理 (修复 180度横线问题 + 椭圆计算)
-clean_bbox = box(-179.99, -57.99, 179.99, 89.99)
+# 4. Define Visualization Parameters
 
-# 对底图和数据同时进行微量裁剪和修复
-world_gdf = world_gdf.clip(clean_bbox).to_crs(target_crs)
-solar_gdf = solar_gdf.clip(clean_bbox).to_crs(target_crs)
+# --- A. 自定义颜色和分级 (复刻您的截图, 见 figures.toml 的 classes.radiation) ---
+# 分级断点 (注意：UserDefined 只需要指定中间的断点，不需要 min/max)
+custom_bins = STYLE.bins
+# 自定义颜色列表 (10个颜色，对应 10 个区间: <2500, 2500-3000, ..., 7000-8000, >8000)
+custom_colors = STYLE.colors
+# Colormap 对象
+cmap_custom = STYLE.cmap
+# 批量渲染变体的输出目录 (变体见 figures.toml 的 figures.fig2.variants)
+variant_dir = 'exported_plots/variants'
 
-# 2. 转换世界地图投影
 
-# 3. Data Preprocessing
-solar_gdf['光照强'] = pd.to_numeric(solar_gdf['光照强'], errors='coerce')*12/1e6
-for col in ['jizhong_ar','fenbu_area','total_area']:
-    solar_gdf[col] = pd.to_numeric(solar_gdf[col], errors='coerce')*0.2/1e6
+@timed()
+def load_layers(solar=True, points=False):
+    """
+    读取 (或从缓存加载) 已投影的底图与光伏网格; solar=False 时只加载底图 (流式读取时使用),
+    points=True 时光伏网格为不含多边形的点图层 (只按质心统计时使用, 见 pvplot.data.load_points)
+    """
+    # D. 投影处理 (修复 180度横线问题 + 椭圆计算)
+    # 对底图进行微量裁剪和修复, 结果缓存为 GeoParquet
+    world_gdf = load_world(BBOX_FIG2, target_crs, shp_path=world_path)
+    # 3. Data Preprocessing (数值转换与单位换算: 光照强 *12/1e6, 面积 *0.2/1e6)
+    solar_gdf = load_for_figure(180, raster_dpi, SOLAR_BBOX, target_crs, scaled=True,
+                                level=solar_level, sources=solar_sources, points=points) if solar else None
+    return world_gdf, solar_gdf
 
-# 4. Define Visualization Parameters
 
-# --- A. 自定义颜色和分级 (复刻您的截图) ---
-# 分级断点 (注意：UserDefined 只需要指定中间的断点，不需要 min/max)
-custom_bins = [2500, 3000, 3500, 4000, 4500, 5000, 6000, 7000, 8000]
-
-# 自定义颜色列表 (10个颜色，对应 10 个区间)
-# 区间: <2500, 2500-3000, ..., 7000-8000, >8000
-custom_colors = [
-    '#3a0ca3', # <2500 (深蓝)
-    '#4361ee', # 2500-3000
-    '#4cc9f0', # 3000-3500
-    '#00f5d4', # 3500-4000 (青)
-    '#9ef01a', # 4000-4500 (浅绿)
-    '#ccff33', # 4500-5000
-    '#ffff00', # 5000-6000 (黄)
-    '#ffb700', # 6000-7000
-    '#ff7b00', # 7000-8000
-    '#ff0000', # >8000 (红)
-]
-# 创建 Colormap 对象
-cmap_custom = mcolors.ListedColormap(custom_colors)
-
-# 5. Plotting
-# 设置符合 Nature 要求的尺寸 (180mm 宽)
-fig, ax = plt.subplots(figsize=(nature_double_col_width, nature_double_col_width*0.5)) 
-
-# Layer 1: World Map (Background)
-world_gdf.plot(
-    ax=ax,
-    color='#FFF',
-    edgecolor='#bbbbbb',
-    linewidth=0.3,
-    zorder=1
-)
-
-# Layer 2: Solar Intensity (Filled Colors)
-print("Plotting Solar Layer...")
-solar_gdf.plot(
-    column='光照强',
-    ax=ax,
-    scheme='UserDefined',
-    classification_kwds={'bins': custom_bins},
-    cmap=cmap_custom, 
-    legend=True,
-    legend_kwds={
-        'title': 'Solar Radiation (MJ/m²)', 
-        'loc': 'lower left',
-        'fontsize': 5,
-        'title_fontsize': 6,
-        'frameon': False
-    },
-    alpha=1,
-    # ★关键修改★：去掉边框，否则图会全黑！
-    edgecolor='none', 
-    linewidth=0,
-    rasterized=True,
-    zorder=2
-)
-
-# 确保 solar_gdf 也转换到同样的投影
-# 复制一份用于画散点
-solar_points = solar_gdf.copy()
-solar_points = solar_points.dropna(subset=['total_area'])
-solar_points = solar_points[solar_points['total_area'] > 1e-3]
-# 在投影坐标系下计算质心，不会弹出警告
-solar_points['geometry'] = solar_points.geometry.centroid
-# 调整点的大小
-scale_factor = 1
-area_sizes = (solar_points['total_area'] / solar_points['total_area'].max()) * scale_factor
-# 避免点太小看不到，加一个基数
-area_sizes = area_sizes + 0.5 
-
-# # 对数映射处理：
-# # 使用 np.log10 让面积分布更均匀
-# # 我们将 log 后的值线性映射到一个视觉舒适的尺寸范围
-# log_area = np.log10(solar_points['total_area'])
-# log_min, log_max = log_area.min(), log_area.max()
-
-# # 这里的 3e-4 是你提到的参考值。在对数映射下，我们设置一个基础倍数
-# # 你可以通过调整 base_size 来整体放大或缩小点
-# base_size = 3e-4 
-# # 映射到 [0.1, 5] 这种 matplotlib 标准 point 尺寸，或者直接按你的比例缩放
-# solar_points['markersize'] = ((log_area - log_min) / (log_max - log_min)) * 5 + 0.1
-
-# # --- 3. 抽样优化 (解决文件体积与渲染压力) ---
-# # 如果点数超过 2 万，建议抽样。在 Robinson 投影下，2 万个分布均匀的点足以表达全球趋势
-# if len(solar_points) > 20000:
-#     plot_points = solar_points.sample(n=20000, random_state=42)
-# else:
-#     plot_points = solar_points
-
-# 如果点数超过 5 万，建议抽样展示，否则 PDF 渲染依然会卡顿
-if len(solar_points) > 50000:
-    plot_points = solar_points.sample(n=50000, random_state=42)
-else:
-    plot_points = solar_points
-# # Layer 3: Total Area (Scatter Points)
-# print("Plotting Scatter Layer...")
-plot_points.plot(
-    ax=ax,
-    markersize=0.3,
-    marker='.',          # 使用圆点
-    color='#800080',     # 紫色实心
-    edgecolor='none',    # 【关键】移除边框，防止变成空心圆感
-    linewidth=0,         # 线宽设为0
-    alpha=0.7,           # 稍微透明一点可以让重叠部分更有质感
-    zorder=3,
-    rasterized=True,      # 【必须】解决 PDF 打不开的问题
-    label='Total Area'
-)
-
-# 6. Final Touches
-# plt.title('Global Solar Intensity and Total Area Distribution', fontsize=7)
-plt.axis('off')
-plt.tight_layout()
-
-# Save
-print("Saving figure...")
-# 建议保存为高 DPI 的 PNG 以查看效果，PDF 用于投稿
-plt.savefig('exported_plots/solar_visualization_fixed.pdf', dpi=300, bbox_inches='tight')
-# plt.show()
-print("Done.")
+def precompute_layers(solar_gdf):
+    """
+    全球图中与样式无关的部分: 光照强度栅格与按像素抽稀后的散点 (结构同 stream_layers 的结果),
+    批量渲染变体时只算一次
+    """
+    width_px = figure_pixels(180, raster_dpi)
+    with stage("rasterize"):
+        index, extent = cached_index(solar_gdf, width_px)
+    radiation = take(index, solar_gdf['光照强'].values)
+    # 筛选用于画散点的网格 (只取数组, 不再构建完整的点 GeoDataFrame)
+    solar_points = solar_gdf.dropna(subset=['total_area'])
+    solar_points = solar_points[solar_points['total_area'] > 1e-3]
+    # 按输出像素网格抽稀: 每个像素保留 total_area 最大的质心, 并累计格内 total_area
+    # (在投影坐标系下计算的质心, 即缓存中的 cx / cy)
+    weights = solar_points['total_area'].values
+    with stage("thin"):
+        keep, area_sum = thin_points(
+            solar_points['cx'].values, solar_points['cy'].values, extent,
+            width_px, weights=weights, return_sums=True
+        )
+    points = ThinnedPoints(solar_points['cx'].values[keep], solar_points['cy'].values[keep],
+                           weights[keep], area_sum)
+    value_range = solar_gdf['光照强'].values
+    # "key": 光照栅格的缓存键, 各组断点的分级结果按它缓存 (见 pvplot.classify)
+    return {"radiation": radiation, "extent": extent, "key": field_key(solar_gdf, '光照强', extent, width_px),
+            "range": (np.nanmin(value_range), np.nanmax(value_range)), "points": points}
+
+
+@pipeline("drawmap")
+def render(world_gdf, solar_gdf, output_path=output_path, streamed=None, style=None):
+    """
+    绘制光照强度填色 + 光伏面积散点的全球图; solar_gdf 需为换算后的单位 (scaled=True)
+    streamed 为 stream_layers / precompute_layers 的结果, 给出时不使用 solar_gdf
+    style 为 figures.toml 中的变体 (pvplot.spec.FigureStyle), 默认使用本模块的参数
+    """
+    if style is None:
+        rc, bins, colors, cmap = NATURE_RC, custom_bins, custom_colors, cmap_custom
+        figsize = (nature_double_col_width, nature_double_col_width * STYLE.aspect)
+    else:
+        rc, bins, colors, cmap, figsize = style.rc, style.bins, style.colors, style.cmap, style.figsize
+    if streamed is None:
+        streamed = precompute_layers(solar_gdf)
+    with mpl.rc_context(rc):
+        # 5. Plotting
+        # 设置符合 Nature 要求的尺寸 (180mm 宽)
+        fig, ax = plt.subplots(figsize=figsize)
+
+        # Layer 1: World Map (Background)
+        draw_basemap(ax, world_gdf, BASEMAP_STYLE, basemap_mode, zorder=1,
+                     width_px=figure_pixels(180, raster_dpi), dpi=raster_dpi)
+
+        # Layer 2: Solar Intensity (Filled Colors)
+        # 网格先烧录成栅格 (磁盘缓存), 再按 custom_bins 分级后一次 imshow 绘制
+        print("Plotting Solar Layer...")
+        radiation, extent, value_range = streamed["radiation"], streamed["extent"], streamed["range"]
+        with stage("classify"):
+            classes = cached_classes(radiation, bins, streamed.get("key"))
+        draw_classes(ax, classes, extent, cmap, alpha=1, zorder=2)
+        ax.legend(
+            handles=marker_handles(colors, userdefined_labels(*value_range, bins)),
+            title='Solar Radiation (MJ/m²)',
+            loc='lower left',
+            fontsize=5,
+            title_fontsize=6,
+            frameon=False
+        )
+
+        # 抽稀后的光伏网格质心 (见 precompute_layers)
+        thinned = streamed["points"]
+        plot_points = {'cx': thinned.x, 'cy': thinned.y}
+        area_sum = thinned.sums
+        # 调整点的大小
+        scale_factor = 1
+        area_sizes = (area_sum / area_sum.max()) * scale_factor
+        # 避免点太小看不到，加一个基数
+        area_sizes = area_sizes + 0.5
+
+        # # 对数映射处理：
+        # # 使用 np.log10 让面积分布更均匀
+        # # 我们将 log 后的值线性映射到一个视觉舒适的尺寸范围
+        # log_area = np.log10(solar_points['total_area'])
+        # log_min, log_max = log_area.min(), log_area.max()
+
+        # # 这里的 3e-4 是你提到的参考值。在对数映射下，我们设置一个基础倍数
+        # # 你可以通过调整 base_size 来整体放大或缩小点
+        # base_size = 3e-4
+        # # 映射到 [0.1, 5] 这种 matplotlib 标准 point 尺寸，或者直接按你的比例缩放
+        # solar_points['markersize'] = ((log_area - log_min) / (log_max - log_min)) * 5 + 0.1
+
+        # # Layer 3: Total Area (Scatter Points)
+        # print("Plotting Scatter Layer...")
+        ax.scatter(
+            plot_points['cx'], plot_points['cy'],
+            s=0.3,
+            marker='.',          # 使用圆点
+            color='#800080',     # 紫色实心
+            edgecolors='none',   # 【关键】移除边框，防止变成空心圆感
+            linewidths=0,        # 线宽设为0
+            alpha=0.7,           # 稍微透明一点可以让重叠部分更有质感
+            zorder=3,
+            label='Total Area'
+        )
+
+        # 6. Final Touches
+        # plt.title('Global Solar Intensity and Total Area Distribution', fontsize=7)
+        ax.axis('off')
+        fig.tight_layout()
+
+        # Save
+        print("Saving figure...")
+        # 建议保存为高 DPI 的 PNG 以查看效果，PDF 用于投稿
+        with stage("savefig"):
+            # 点数超过矢量预算时自动栅格化 (PDF 才能正常打开), 见 pvplot.export
+            save_figure(fig, output_path, dpi=300, bbox_inches='tight')
+        # plt.show()
+        plt.close(fig)
+    return output_path
+
+
+def region_solar(world_gdf, regions, width_mm=region_width_mm):
+    """区域图用的光伏网格: 按最小区域的宽度选级别, 细网格 (如 1km) 存在时区域图自动使用"""
+    if solar_level != "auto":
+        km = solar_level
+    else:
+        km = min(select_level(width_mm, raster_dpi, extent_width=region_width_m(r), sources=solar_sources)
+                 for r in regions)
+    return load_level(km, SOLAR_BBOX, target_crs, scaled=True, sources=solar_sources)
+
+
+def make_regions(world_gdf, countries=(), bboxes=()):
+    """国家名与经纬度范围 (minx, miny, maxx, maxy) -> Region 列表"""
+    regions = [country_region(world_gdf, name) for name in countries]
+    regions += [bbox_region(bbox, crs=target_crs) for bbox in bboxes]
+    return regions
+
+
+def draw_region_panel(ax, world_local, solar_local, extent, width_px):
+    """在 ax 上绘制区域局部投影下的光照分级栅格 + 光伏面积散点 (与全球图同一配色)"""
+    draw_basemap(ax, world_local, BASEMAP_STYLE, zorder=1)
+    if len(solar_local):
+        with stage("rasterize"):
+            index, _ = cached_index(solar_local, width_px, extent)
+        draw_classes(ax, classify(take(index, solar_local['光照强'].values), custom_bins), extent,
+                     cmap_custom, alpha=1, zorder=2)
+        points = solar_local[solar_local['total_area'] > 1e-3]
+        with stage("thin"):
+            keep = thin_points(points['cx'].values, points['cy'].values, extent, width_px,
+                               weights=points['total_area'].values)
+        if len(keep):
+            # 与全球图相同的固定点大小
+            ax.scatter(points['cx'].values[keep], points['cy'].values[keep],
+                       s=0.3, marker='.', color='#800080',
+                       edgecolors='none', linewidths=0, alpha=0.7, zorder=3)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+
+def render_region(world_gdf, solar_gdf, region, output_path, width_mm=region_width_mm):
+    """单个区域图: 只取区域内的网格, 投影到区域中心的 LAEA 后绘制"""
+    with stage("region_layers"):
+        world_local, solar_local = region_layers(world_gdf, solar_gdf, region)
+    extent = region_extent(region)
+    width = width_mm * mm_to_inch
+    height = width * (extent[3] - extent[2]) / (extent[1] - extent[0])
+    with mpl.rc_context(NATURE_RC):
+        fig, ax = plt.subplots(figsize=(width, height))
+        draw_region_panel(ax, world_local, solar_local, extent, figure_pixels(width_mm, raster_dpi))
+        ax.set_title(region.name, fontsize=6)
+        with stage("savefig"):
+            save_figure(fig, output_path, dpi=raster_dpi, bbox_inches='tight')
+        plt.close(fig)
+    return output_path
+
+
+def region_output(region, fmt="pdf", output_dir=region_dir):
+    return os.path.join(output_dir, f"{region.name.replace(' ', '_')}.{fmt}")
+
+
+def _render_region_job(shared, job):
+    region, fmt = job
+    return render_region(shared["world"], shared["solar"], region,
+                         region_output(region, fmt, shared["output_dir"]), shared["width_mm"])
+
+
+@pipeline("regions")
+def render_regions(world_gdf, solar_gdf, regions, output_dir=region_dir, formats=("pdf",), workers=None,
+                   width_mm=region_width_mm):
+    """
+    批量渲染区域图: 空间索引 / 国家归属在父进程建好一次, 各区域在进程池中并行绘制
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with stage("prepare"):
+        prepare(solar_gdf, world_gdf, regions)
+    jobs = [(region, fmt) for region in regions for fmt in formats]
+    shared = {"world": world_gdf, "solar": solar_gdf, "output_dir": output_dir, "width_mm": width_mm}
+    return run_jobs(_render_region_job, jobs, shared, workers=workers,
+                    label=lambda job: f"{job[0].name}/{job[1]}")
+
+
+def _render_variant_job(shared, job):
+    variant, fmt = job
+    path = os.path.join(shared["output_dir"], f"fig2_{variant}.{fmt}")
+    return render(shared["world"], None, path, streamed=attach_layers(shared["layers"]),
+                  style=compile_figure("fig2", variant))
+
+
+def render_variants(world_gdf, solar_gdf, output_dir=variant_dir, names=None, formats=("pdf",), workers=None):
+    """
+    批量渲染 figures.fig2 的变体 (不同分级 / 配色): 栅格与抽稀散点在父进程算一次,
+    各变体在进程池中只重新分级着色与保存
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(name, fmt) for name in (names or variant_names("fig2")) for fmt in formats]
+    # 光照栅格与散点发布为共享内存映射, 子进程只读映射 (见 pvplot.shared)
+    with published_layers(precompute_layers(solar_gdf)) as layers:
+        shared = {"world": world_gdf, "layers": layers, "output_dir": output_dir}
+        return run_jobs(_render_variant_job, jobs, shared, workers=workers,
+                        label=lambda job: f"{job[0]}/{job[1]}")
+
+
+def tile_layers(scheme="robinson", max_zoom=4, min_zoom=0):
+    """
+    z/x/y 瓦片用的图层: 光照强度分级 (像元平均后按 custom_bins 着色)
+    与光伏总面积密度 (紫色, 透明度随密度增加, 无装机的像元透明)
+    """
+    solar_gdf = load_scheme_layer(scheme, shp_path=solar_path, scaled=True)
+    half = SCHEMES[scheme][1]
+    radiation = level_from_polygons(solar_gdf, solar_gdf['光照强'].values, max_zoom, half)
+    area = level_from_points(solar_gdf['cx'].values, solar_gdf['cy'].values,
+                             solar_gdf['total_area'].values, max_zoom, half)
+    density = level_values(area, "density")
+    density = density[density > 0]
+    return {
+        "fig2_radiation": {
+            "levels": pyramid(radiation, min_zoom), "how": "mean",
+            # 分级编号直接作为 ListedColormap 的颜色序号
+            "cmap": cmap_custom, "norm": lambda v: classify(v, custom_bins),
+        },
+        "fig2_total_area": {
+            "levels": pyramid(area, min_zoom), "how": "density",
+            "cmap": mcolors.LinearSegmentedColormap.from_list(
+                "pv_area", [(0.5, 0, 0.5, 0.25), (0.5, 0, 0.5, 0.9)]),
+            "norm": mcolors.LogNorm(vmin=np.nanpercentile(density, 5),
+                                    vmax=np.nanpercentile(density, 99), clip=True),
+        },
+    }
+
+
+@timed()
+def stream_layers(bbox=SOLAR_BBOX, chunk_size=CHUNK_SIZE):
+    """
+    分块流式读取 solar_path, 直接累加为 render(streamed=...) 需要的光照栅格与抽稀后的散点,
+    不在内存中保留整个网格; 栅格范围取 bbox 的投影范围
+    """
+    extent = projected_extent(bbox, target_crs)
+    width = figure_pixels(180, raster_dpi)
+    # 第一遍: 光照强度 (需要多边形烧录)
+    chunks = iter_chunks(solar_path, ['光照强'], bbox=bbox, target_crs=target_crs,
+                         chunk_size=chunk_size, geometry=True, scaled=True)
+    radiation, value_range = stream_raster(chunks, '光照强', extent, width)
+    # 第二遍: 只读 total_area 超过阈值的网格 (阈值换回原始单位后在读取时过滤)
+    threshold = 1e-3 / NUMERIC_FIELDS['total_area']
+    chunks = iter_chunks(solar_path, ['total_area'], bbox=bbox, where=positive_filter('total_area', threshold),
+                         target_crs=target_crs, chunk_size=chunk_size, scaled=True)
+    points = stream_thin(chunks, 'total_area', extent, width, threshold=1e-3)
+    return {"radiation": radiation, "extent": extent, "range": value_range, "points": points}
+
+
+if __name__ == "__main__":
+    print("Loading data...")
+    world_gdf, solar_gdf = load_layers()
+    render(world_gdf, solar_gdf)
+    print("Done.")
@@ -1,137 +1,184 @@
-import geopandas as gpd
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import matplotlib.patches as mpatches
-import numpy as np
-from shapely.geometry import box
-import matplotlib as mpl
-
-# --- 1. Nature 标准环境设置 ---
-mm_to_inch = 1 / 25.4
-nature_double_col_width = 180 * mm_to_inch
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-mpl.rcParams['font.family'] = 'sans-serif'
-mpl.rcParams['font.sans-serif'] = ['Arial', 'Helvetica']
-mpl.rcParams['pdf.fonttype'] = 42
-mpl.rcParams['ps.fonttype'] = 42
-mpl.rcParams['font.size'] = 6
-mpl.rcParams['axes.linewidth'] = 0.5
+import matplotlib as mpl
 
-# --- 2. 路径与数据加载 ---
+from pvplot.basemap import draw_basemap
+from pvplot.data import BBOX_FIG2_V2, SOLAR_BBOX, TARGET_CRS, load_world
+from pvplot.export import save_figure
+from pvplot.lazy import lazy_import
+from pvplot.classify import cached_classes, field_key, patch_handles
+from pvplot.raster import cached_index, draw_classes, figure_pixels, take
+from pvplot.levels import SOLAR_LEVELS, load_for_figure
+from pvplot.parallel import run_jobs
+from pvplot.profiling import pipeline, stage, timed
+from pvplot.shared import attach_layers, published_layers
+from pvplot.spec import MM_TO_INCH, compile_figure, variant_names
+from pvplot.stream import ThinnedPoints
+from pvplot.thinning import thin_points
+
+# 重量级依赖在首次使用时才导入 (main.py list / 增量构建检查只读取本模块的参数)
+plt = lazy_import("matplotlib.pyplot")
+
+# --- 1. Nature 标准环境设置 (尺寸、rcParams 与分级配色见 figures.toml 的 figures.fig2v2) ---
+STYLE = compile_figure("fig2v2")
+mm_to_inch = MM_TO_INCH
+nature_double_col_width = STYLE.width_mm * mm_to_inch
+
+# 在 render() 内通过 rc_context 生效, 不污染同进程内的其他图
+NATURE_RC = STYLE.rc
+
+# --- 2. 路径 ---
 solar_path = r"data/10km/Solar_10km.shp"
+# 网格级别: "auto" 按图宽与 raster_dpi 选择 (见 pvplot.levels), 或指定 km
+solar_level = "auto"
+solar_sources = {**SOLAR_LEVELS, 10: solar_path}
 world_path = "data/map/世界国家地图.shp"
-
-print("Loading and projecting data...")
-solar_gdf = gpd.read_file(solar_path)
-world_gdf = gpd.read_file(world_path)
-
-# 定义投影 (Robinson) 并修复 180 度经线裁切问题
-target_crs = "ESRI:54030" 
-clean_bbox = box(-179.9, -58, 179.9, 85)
-world_gdf = world_gdf.clip(clean_bbox).to_crs(target_crs)
-solar_gdf = solar_gdf.clip(clean_bbox).to_crs(target_crs)
-
-# 数据预处理
-solar_gdf['光照强'] = pd.to_numeric(solar_gdf['光照强'], errors='coerce') * 12 / 1e6
-for col in ['jizhong_ar', 'fenbu_area', 'total_area']:
-    solar_gdf[col] = pd.to_numeric(solar_gdf[col], errors='coerce') * 0.2 / 1e6
-
-# --- 3. 定义可视化参数 (精准复刻原图色阶) ---
-custom_bins = [2500, 3000, 3500, 4000, 4500, 5000, 6000, 7000, 8000]
-custom_colors = [
-    '#3a0ca3', # <2500
-    '#4361ee', # 2500-3000
-    '#4cc9f0', # 3000-3500
-    '#00f5d4', # 3500-4000
-    '#9ef01a', # 4000-4500
-    '#ccff33', # 4500-5000
-    '#ffff00', # 5000-6000
-    '#ffb700', # 6000-7000
-    '#ff7b00', # 7000-8000
-    '#ff0000', # >8000
-]
-legend_labels = [
-    '<2500', '2500-3000', '3000-3500', '3500-4000', '4000-4500',
-    '4500-5000', '5000-6000', '6000-7000', '7000-8000', '>8000'
-]
-cmap_custom = mcolors.ListedColormap(custom_colors)
-
-# --- 4. 绘图 ---
-fig, ax = plt.subplots(figsize=(nature_double_col_width, nature_double_col_width * 0.45))
-
-# Layer 1: 世界底图 (灰色边框)
-world_gdf.plot(ax=ax, color='#FFFFFF', edgecolor='#d0d0d0', linewidth=0.2, zorder=1)
-
-# Layer 2: 光照强度填充层 (栅格化处理以减小体积)
-print("Plotting Solar intensity...")
-solar_gdf.plot(
-    column='光照强',
-    ax=ax,
-    scheme='UserDefined',
-    classification_kwds={'bins': custom_bins},
-    cmap=cmap_custom, 
-    legend=False,  # 我们稍后手动添加图例
-    edgecolor='none', 
-    linewidth=0,
-    rasterized=True,
-    zorder=2
-)
-
-# Layer 3: 分布式 PV 散点层
-print("Plotting Scatter points...")
-solar_points = solar_gdf.dropna(subset=['total_area']).copy()
-solar_points = solar_points[solar_points['total_area'] > 1e-4]
-solar_points['geometry'] = solar_points.geometry.centroid
-
-# 采样优化
-if len(solar_points) > 40000:
-    solar_points = solar_points.sample(n=40000, random_state=42)
-
-solar_points.plot(
-    ax=ax,
-    markersize=0.15,
-    marker='o',
-    color='#5e2ca5', # 深紫色
-    edgecolor='none',
-    alpha=0.7,
-    zorder=3,
-    rasterized=True
-)
-
-# --- 5. 手动定制条形色块图例 ---
-legend_handles = []
-for i in range(len(custom_colors)):
-    patch = mpatches.Patch(color=custom_colors[i], label=legend_labels[i])
-    legend_handles.append(patch)
-
-leg = ax.legend(
-    handles=legend_handles,
-    title='Solar Radiation(MJ/m2)',
-    loc='lower left',
-    bbox_to_anchor=(0.02, 0.1), 
-    frameon=False,
-    fontsize=5,
-    title_fontsize=6,
-    handlelength=1.2,  # 条形块长度
-    handleheight=0.7,  # 条形块高度
-    labelspacing=0.35  # 条目间距
-)
-leg._legend_box.align = "left"
-
-# # --- 6. 装饰元素 (指北针 & 标题) ---
-# # 指北针
-# ax.text(0.96, 0.95, 'N', transform=ax.transAxes, fontsize=10, ha='center', fontweight='bold')
-# ax.annotate('', xy=(0.96, 0.88), xytext=(0.96, 0.95),
-#             transform=ax.transAxes, arrowprops=dict(facecolor='black', width=0.8, headwidth=4))
-
-# 左上角大标题
-# ax.text(0.02, 0.95, 'Distributed PV', transform=ax.transAxes, fontsize=8, fontweight='bold', ha='left')
-
-plt.axis('off')
-plt.tight_layout()
-
-# --- 7. 保存结果 ---
-print("Saving figure...")
-plt.savefig('exported_plots/solar_visualization_fixed.pdf', dpi=300, bbox_inches='tight')
-print("Done.")
\ No newline at end of file
+output_path = 'exported_plots/solar_visualization_fixed.pdf'
+target_crs = TARGET_CRS
+# 光照强度栅格的分辨率 (与保存 DPI 一致)
+raster_dpi = 300
+# 世界底图样式与绘制方式 ("vector" / "raster", 见 pvplot.basemap)
+BASEMAP_STYLE = {"facecolor": "#FFFFFF", "edgecolor": "#d0d0d0", "linewidth": 0.2}
+basemap_mode = "vector"
+
+# --- 3. 定义可视化参数 (精准复刻原图色阶, 与 Fig2 共用 classes.radiation) ---
+custom_bins = STYLE.bins
+custom_colors = STYLE.colors
+legend_labels = STYLE.labels
+cmap_custom = STYLE.cmap
+# 批量渲染变体的输出目录
+variant_dir = 'exported_plots/variants'
+
+
+@timed()
+def load_layers():
+    """读取 (或从缓存加载) 已投影的底图与光伏网格"""
+    # 定义投影 (Robinson) 并修复 180 度经线裁切问题, 裁剪/投影结果走 pvplot 缓存
+    world_gdf = load_world(BBOX_FIG2_V2, target_crs, shp_path=world_path)
+    # 数据预处理 (数值转换与单位换算已在加载层完成)
+    solar_gdf = load_for_figure(180, raster_dpi, SOLAR_BBOX, target_crs, scaled=True,
+                                level=solar_level, sources=solar_sources)
+    return world_gdf, solar_gdf
+
+
+def precompute_layers(solar_gdf):
+    """与样式无关的部分: 光照强度栅格与抽稀后的分布式 PV 散点, 批量渲染变体时只算一次"""
+    width_px = figure_pixels(180, raster_dpi)
+    with stage("rasterize"):
+        index, extent = cached_index(solar_gdf, width_px)
+    radiation = take(index, solar_gdf['光照强'].values)
+    solar_points = solar_gdf.dropna(subset=['total_area'])
+    solar_points = solar_points[solar_points['total_area'] > 1e-4]
+    # 抽稀优化: 每个输出像素只保留 total_area 最大的一个质心
+    weights = solar_points['total_area'].values
+    with stage("thin"):
+        keep, area_sum = thin_points(solar_points['cx'].values, solar_points['cy'].values, extent,
+                                     width_px, weights=weights, return_sums=True)
+    points = ThinnedPoints(solar_points['cx'].values[keep], solar_points['cy'].values[keep],
+                           weights[keep], area_sum)
+    # "key": 光照栅格的缓存键, 各组断点的分级结果按它缓存 (见 pvplot.classify)
+    return {"radiation": radiation, "extent": extent, "key": field_key(solar_gdf, '光照强', extent, width_px),
+            "points": points}
+
+
+@pipeline("drawmapV2")
+def render(world_gdf, solar_gdf, output_path=output_path, layers=None, style=None):
+    """
+    绘制 V2 版光照强度 + 分布式 PV 散点图; solar_gdf 需为换算后的单位 (scaled=True)
+    layers 为 precompute_layers 的结果 (给出时不使用 solar_gdf), style 为 figures.toml 中的变体
+    """
+    if style is None:
+        rc, bins, colors, labels, cmap = NATURE_RC, custom_bins, custom_colors, legend_labels, cmap_custom
+        figsize = (nature_double_col_width, nature_double_col_width * STYLE.aspect)
+    else:
+        rc, bins, colors, labels, cmap = style.rc, style.bins, style.colors, style.labels, style.cmap
+        figsize = style.figsize
+    if layers is None:
+        layers = precompute_layers(solar_gdf)
+    with mpl.rc_context(rc):
+        # --- 4. 绘图 ---
+        fig, ax = plt.subplots(figsize=figsize)
+
+        # Layer 1: 世界底图 (灰色边框)
+        draw_basemap(ax, world_gdf, BASEMAP_STYLE, basemap_mode, zorder=1,
+                     width_px=figure_pixels(180, raster_dpi), dpi=raster_dpi)
+
+        # Layer 2: 光照强度填充层 (网格烧录为缓存栅格, 分级后一次 imshow, 图例稍后手动添加)
+        print("Plotting Solar intensity...")
+        with stage("classify"):
+            classes = cached_classes(layers["radiation"], bins, layers["key"])
+        draw_classes(ax, classes, layers["extent"], cmap, zorder=2)
+
+        # Layer 3: 分布式 PV 散点层 (抽稀后的质心, 见 precompute_layers)
+        print("Plotting Scatter points...")
+        points = layers["points"]
+        ax.scatter(
+            points.x, points.y,
+            s=0.15,
+            marker='o',
+            color='#5e2ca5', # 深紫色
+            edgecolors='none',
+            alpha=0.7,
+            zorder=3
+        )
+
+        # --- 5. 手动定制条形色块图例 ---
+        leg = ax.legend(
+            handles=patch_handles(colors, labels),
+            title='Solar Radiation(MJ/m2)',
+            loc='lower left',
+            bbox_to_anchor=(0.02, 0.1),
+            frameon=False,
+            fontsize=5,
+            title_fontsize=6,
+            handlelength=1.2,  # 条形块长度
+            handleheight=0.7,  # 条形块高度
+            labelspacing=0.35  # 条目间距
+        )
+        leg._legend_box.align = "left"
+
+        # # --- 6. 装饰元素 (指北针 & 标题) ---
+        # # 指北针
+        # ax.text(0.96, 0.95, 'N', transform=ax.transAxes, fontsize=10, ha='center', fontweight='bold')
+        # ax.annotate('', xy=(0.96, 0.88), xytext=(0.96, 0.95),
+        #             transform=ax.transAxes, arrowprops=dict(facecolor='black', width=0.8, headwidth=4))
+
+        # 左上角大标题
+        # ax.text(0.02, 0.95, 'Distributed PV', transform=ax.transAxes, fontsize=8, fontweight='bold', ha='left')
+
+        ax.axis('off')
+        fig.tight_layout()
+
+        # --- 7. 保存结果 ---
+        print("Saving figure...")
+        with stage("savefig"):
+            save_figure(fig, output_path, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+    return output_path
+
+
+def _render_variant_job(shared, job):
+    variant, fmt = job
+    path = os.path.join(shared["output_dir"], f"fig2v2_{variant}.{fmt}")
+    return render(shared["world"], None, path, layers=attach_layers(shared["layers"]),
+                  style=compile_figure("fig2v2", variant))
+
+
+def render_variants(world_gdf, solar_gdf, output_dir=variant_dir, names=None, formats=("pdf",), workers=None):
+    """批量渲染 figures.fig2v2 的变体: 栅格与抽稀散点在父进程算一次, 各变体只重新分级着色"""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(name, fmt) for name in (names or variant_names("fig2v2")) for fmt in formats]
+    # 光照栅格与散点发布为共享内存映射, 子进程只读映射 (见 pvplot.shared)
+    with published_layers(precompute_layers(solar_gdf)) as layers:
+        shared = {"world": world_gdf, "layers": layers, "output_dir": output_dir}
+        return run_jobs(_render_variant_job, jobs, shared, workers=workers,
+                        label=lambda job: f"{job[0]}/{job[1]}")
+
+
+if __name__ == "__main__":
+    print("Loading and projecting data...")
+    world_gdf, solar_gdf = load_layers()
+    render(world_gdf, solar_gdf)
+    print("Done.")
@@ -1,104 +1,208 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import os
-from scipy.interpolate import make_interp_spline
-
-# --- 1. 全局 Nature 样式配置 ---
-plt.rcParams.update({
-    'font.family': 'sans-serif',
-    'font.sans-serif': ['Arial'],
-    'pdf.fonttype': 42,
-    'ps.fonttype': 42,
-    'font.size': 6,             # Nature 常用字号 5-7pt
-    'axes.linewidth': 0.5,      # 细边框
-    'xtick.major.width': 0.5,
-    'ytick.major.width': 0.5,
-    'xtick.direction': 'out',
-    'ytick.direction': 'out'
-})
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pvplot.lazy import lazy_import
+from pvplot.parallel import run_jobs
+from pvplot.profiling import pipeline, stage
+from pvplot.smoothing import smooth_columns
+from pvplot.spec import MM_TO_INCH, compile_figure
+from pvplot.tables import read_sheet, sheet_columns
+
+# 重量级依赖在首次使用时才导入 (main.py list / 增量构建检查只读取本模块的参数)
+pd = lazy_import("pandas")
+plt = lazy_import("matplotlib.pyplot")
+
+# --- 1. 全局 Nature 样式配置 (见 figures.toml 的 figures.nations, 在 export_distribution_plots 内通过 rc_context 生效) ---
+STYLE = compile_figure("nations")
+NATURE_RC = STYLE.rc
 
 # 定义国家列表
 COUNTRIES = ['China', 'United States', 'India', 'Germany', 'Japan', 'Spain', 'Australia', 'Mexico', 'Chile']
 
 # 定义颜色方案 (Nature 风格)
-COLOR_CENTRAL = '#ff7b00'  # 集中式：深红
-COLOR_DISTRIB = '#4361ee'  # 分布式：深蓝
+COLOR_CENTRAL = STYLE.named_colors["central"]      # 集中式：深红
+COLOR_DISTRIB = STYLE.named_colors["distributed"]  # 分布式：深蓝
+
+# 请确保路径正确
+EXCEL_FILE = r"Fig2/excel/SolarDistributed.xlsx"
+# 全球汇总表, 列名在加载时统一为 "Global 集中式" / "Global 分布式"
+GLOBAL_EXCEL_FILE = r"Fig2/excel/SolarDistributedAll.xlsx"
+GLOBAL = 'Global'
+
+# 原先 8 层 fill_between (alpha = 0.08 * i/8) 叠加后的等效不透明度:
+# 8 层形状完全相同, 叠加结果即 1 - Π(1 - alpha_i), 用单层填充一次画出
+FILL_ALPHA = 1 - np.prod(1 - 0.08 * np.arange(1, 9) / 8)
+
+# 单个国家子图尺寸 (25 × 15 mm)
+mm_to_inch = MM_TO_INCH
+PANEL_SIZE = STYLE.figsize
+
+# 曲线平滑方法: "spline" (三次样条, 截断负值) / "pchip" (保形插值, 天然非负)
+SMOOTHING = "spline"
 
-def export_distribution_plots(excel_path, output_dir='exported_plots/nationsFig2'):
+# 导出方式: 每国一个 PDF / 所有国家一个多页 PDF / 一张拼图
+LAYOUTS = ["separate", "multipage", "grid"]
+
+@pipeline("drawnation")
+def export_distribution_plots(excel_path, output_dir='exported_plots/nationsFig2', countries=COUNTRIES,
+                              layout="separate", workers=None, smoothing=SMOOTHING):
     """
     批量导出九个国家的装机量分布图
+    excel_path 也可以直接传入同构的 DataFrame (如 grid_distribution_table 的结果)
+    layout: "separate" 每国一个 PDF (进程池并行), "multipage" 合并为一个多页 PDF,
+            "grid" 所有国家拼成一张图
     """
     # 创建输出文件夹
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
+
+    with stage("load_table"):
+        df = load_distribution_table(excel_path, countries)
+    if df is None:
+        return []
+    # 所有国家的曲线一次批量平滑
+    with stage("smooth"):
+        smoothed = smooth_distribution_table(df, smoothing)
+
+    if layout == "separate":
+        shared = {"df": df, "smoothed": smoothed, "output_dir": output_dir}
+        paths = run_jobs(_export_country, countries, shared, workers=workers)
+        return [p for p in paths if p]
+
+    with plt.rc_context(NATURE_RC):
+        if layout == "multipage":
+            save_path = os.path.join(output_dir, "distribution_all.pdf")
+            from matplotlib.backends.backend_pdf import PdfPages
+
+            with PdfPages(save_path) as pdf:
+                for country in countries:
+                    fig, ax = plt.subplots(figsize=PANEL_SIZE)
+                    if plot_country(ax, df, country, smoothed):
+                        ax.set_title(country, fontsize=6, fontweight='bold', pad=2)
+                        pdf.savefig(fig, dpi=600, bbox_inches='tight', transparent=True)
+                    plt.close(fig)
+        elif layout == "grid":
+            save_path = os.path.join(output_dir, "distribution_grid.pdf")
+            ncols = 3
+            nrows = int(np.ceil(len(countries) / ncols))
+            fig, axes = plt.subplots(nrows, ncols, squeeze=False,
+                                     figsize=(PANEL_SIZE[0] * ncols * 1.3, PANEL_SIZE[1] * nrows * 1.5))
+            for ax, country in zip(axes.flat, countries):
+                if plot_country(ax, df, country, smoothed):
+                    ax.set_title(country, fontsize=6, fontweight='bold', pad=2)
+                else:
+                    ax.set_visible(False)
+            for ax in axes.flat[len(countries):]:
+                ax.set_visible(False)
+            fig.tight_layout()
+            fig.savefig(save_path, dpi=600, bbox_inches='tight', transparent=True)
+            plt.close(fig)
+        else:
+            raise ValueError(f"未知的导出方式: {layout}, 可选 {LAYOUTS}")
+    print(f"已导出: {save_path}")
+    return [save_path]
+
+def grid_distribution_table(solar_gdf, world_gdf, countries=COUNTRIES, scale=1.0):
+    """
+    直接由 10km 网格统计各国装机量 - 光照分布 (替代手工整理的 SolarDistributed.xlsx)
+    solar_gdf 需为换算后单位; scale 为面积 -> 装机量 (GW) 的换算系数
+    """
+    from pvplot.country import country_histograms
+    return country_histograms(solar_gdf, world_gdf, countries, scale=scale)
+
+def load_distribution_table(excel_path, countries=None):
+    """
+    读取分布表并按光照排序; 缺少 '光照' 列时返回 None
+    Excel 经 Parquet 缓存读取, 给出 countries 时只读取这些国家的列
+    """
     # 加载数据
-    df = pd.read_excel(excel_path)
-    df.columns = [str(c).strip() for c in df.columns]
-    
+    if isinstance(excel_path, pd.DataFrame):
+        df = excel_path.copy()
+        df.columns = [str(c).strip() for c in df.columns]
+    else:
+        columns = sheet_columns(excel_path, normalize="distribution")
+        if countries is not None:
+            columns = [c for c in columns if c == '光照' or any(country in c for country in countries)]
+        df = read_sheet(excel_path, columns=columns, normalize="distribution")
+
     # 确保 X 轴（光照）存在并排序
     if '光照' not in df.columns:
         print("错误：Excel 中未找到 '光照' 列")
-        return
-    df = df.sort_values(by='光照')
-    x = df['光照'].values
-
-    for country in COUNTRIES:
-        # 尝试匹配列名（处理“国家 类别”或“类别 国家”两种情况）
-        col_c = next((c for c in df.columns if country in c and '集中式' in c), None)
-        col_d = next((c for c in df.columns if country in c and '分布式' in c), None)
-        
-        if not col_c or not col_d:
-            print(f"跳过 {country}: 未找到对应数据列")
-            continue
+        return None
+    return df.sort_values(by='光照')
+
+def smooth_distribution_table(df, method=SMOOTHING):
+    """对表中除 '光照' 外的所有列批量平滑, 返回 {列名: (x_smooth, y_smooth) 或 None}"""
+    columns = {c: df[c].values for c in df.columns if c != '光照'}
+    return smooth_columns(df['光照'].values, columns, method=method)
+
+def plot_country(ax, df, country, smoothed=None):
+    """在 ax 上绘制一个国家的集中式 / 分布式曲线, 找不到数据列时返回 False"""
+    # 尝试匹配列名（处理“国家 类别”或“类别 国家”两种情况）
+    col_c = next((c for c in df.columns if country in c and '集中式' in c), None)
+    col_d = next((c for c in df.columns if country in c and '分布式' in c), None)
+
+    if not col_c or not col_d:
+        print(f"跳过 {country}: 未找到对应数据列")
+        return False
+    if smoothed is None:
+        smoothed = smooth_columns(df['光照'].values, {c: df[c].values for c in (col_c, col_d)})
 
+    # 绘图逻辑：平滑曲线 + 渐变填充
+    for col_name, color, label in [(col_c, COLOR_CENTRAL, 'Centralized'),
+                                   (col_d, COLOR_DISTRIB, 'Distributed')]:
+        # 数据平滑处理 (有效点不足 4 个时为 None)
+        curve = smoothed.get(col_name)
+        if curve is not None:
+            x_smooth, y_smooth = curve
+
+            # 绘制主线
+            # ax.plot(x_smooth, y_smooth, color=color, linewidth=0.8, zorder=3)
+
+            # 渐变填充: 等效于 8 层 alpha 叠加, 只生成一个 PolyCollection
+            ax.fill_between(x_smooth, 0, y_smooth, color=color,
+                            alpha=FILL_ALPHA, linewidth=0, zorder=2)
+            # ax.fill_between(x_smooth, 0, y_smooth, color=color, alpha=0.7, linewidth=0, zorder=2)
+
+    # 细节美化
+    # ax.set_yscale('log')
+    # ax.set_title(country, fontsize=6, fontweight='bold', pad=-3)
+    ax.set_xlabel('Solar Radiation (MJ/m²)', fontsize=5)
+    ax.set_ylabel('Capacity (GW)', fontsize=5)
+
+    # 移除上方和右侧边框
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    # 调整刻度
+    ax.tick_params(axis='both', which='major', labelsize=5, length=2, pad=1)
+    return True
+
+def _export_country(shared, country):
+    """进程池任务: 导出单个国家的 PDF"""
+    with plt.rc_context(NATURE_RC):
         # 创建符合比例的画布 (例如 40mm x 30mm)
-        mm_to_inch = 1 / 25.4
-        fig, ax = plt.subplots(figsize=(25 * mm_to_inch, 15 * mm_to_inch))
-
-        # 绘图逻辑：平滑曲线 + 渐变填充
-        for col_name, color, label in [(col_c, COLOR_CENTRAL, 'Centralized'), 
-                                       (col_d, COLOR_DISTRIB, 'Distributed')]:
-            y = df[col_name].values
-            
-            # 数据平滑处理
-            mask = ~np.isnan(y)
-            if len(x[mask]) > 3:
-                x_smooth = np.linspace(x[mask].min(), x[mask].max(), 300)
-                spl = make_interp_spline(x[mask], y[mask], k=3)
-                y_smooth = np.maximum(spl(x_smooth), 0) # 确保无负值
-                
-                # 绘制主线
-                # ax.plot(x_smooth, y_smooth, color=color, linewidth=0.8, zorder=3)
-                
-                # 绘制 8 层渐变填充
-                for i in range(1, 9):
-                    ax.fill_between(x_smooth, 0, y_smooth, color=color, 
-                                   alpha=0.08 * (i / 8), linewidth=0, zorder=2)
-                # ax.fill_between(x_smooth, 0, y_smooth, color=color, alpha=0.7, linewidth=0, zorder=2)
-
-        # 细节美化
-        # ax.set_yscale('log')
-        # ax.set_title(country, fontsize=6, fontweight='bold', pad=-3)
-        ax.set_xlabel('Solar Radiation (MJ/m²)', fontsize=5)
-        ax.set_ylabel('Capacity (GW)', fontsize=5)
-        
-        # 移除上方和右侧边框
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        
-        # 调整刻度
-        ax.tick_params(axis='both', which='major', labelsize=5, length=2, pad=1)
-        
+        fig, ax = plt.subplots(figsize=PANEL_SIZE)
+        if not plot_country(ax, shared["df"], country, shared["smoothed"]):
+            plt.close(fig)
+            return None
+
         # 保存文件 (PDF 矢量格式最适合后期拼接)
         file_name = f"{country}_distribution.pdf"
-        save_path = os.path.join(output_dir, file_name)
-        plt.savefig(save_path, dpi=600, bbox_inches='tight', transparent=True)
-        plt.close()
-        print(f"已导出: {file_name}")
+        save_path = os.path.join(shared["output_dir"], file_name)
+        fig.savefig(save_path, dpi=600, bbox_inches='tight', transparent=True)
+        plt.close(fig)
+    print(f"已导出: {file_name}")
+    return save_path
 
 if __name__ == "__main__":
-    # 请确保路径正确
-    EXCEL_FILE = r"Fig2/excel/SolarDistributed.xlsx"
-    export_distribution_plots(EXCEL_FILE)
\ No newline at end of file
+    layout = next((a for a in sys.argv[1:] if a in LAYOUTS), "separate")
+    smoothing = "pchip" if "pchip" in sys.argv[1:] else SMOOTHING
+    if "global" in sys.argv[1:]:
+        # 全球汇总曲线 (SolarDistributedAll.xlsx)
+        export_distribution_plots(GLOBAL_EXCEL_FILE, countries=[GLOBAL], layout=layout, smoothing=smoothing)
+    else:
+        export_distribution_plots(EXCEL_FILE, layout=layout, smoothing=smoothing)
@@ -0,0 +1,115 @@
+"""
+一致性检查: 在合成数据上验证缓存 / 向量化实现与其替代的原实现结果相同, 防止后续修改悄悄破坏
+
+    python benchmarks/run.py --check
+
+每项检查不通过时抛出 AssertionError; region_basemap 需在合成数据根目录 (含 data/) 下运行,
+其余检查只用随机数据
+"""
+import numpy as np
+
+
+def check_region_basemap():
+    """区域图的局部投影底图不能与全球底图共用路径缓存 (二者 attrs 中的 cache_key 相同)"""
+    from pvplot.basemap import _path_arrays, cached_paths
+    from pvplot.data import BBOX_FIG2, SOLAR_BBOX, TARGET_CRS, load_solar, load_world
+    from pvplot.regional import country_region, region_layers
+
+    world = load_world(BBOX_FIG2, TARGET_CRS)
+    solar = load_solar(SOLAR_BBOX, TARGET_CRS, scaled=True)
+    world_local, _ = region_layers(world, solar, country_region(world, "Germany"))
+    assert world_local.attrs.get("cache_key") != world.attrs.get("cache_key"), "区域底图沿用了全球底图的 attrs"
+    # 先取区域底图: 缓存键冲突时全球底图会读到区域底图写入的路径
+    local_paths = [p for p in cached_paths(world_local) if p is not None]
+    global_paths = [p for p in cached_paths(world) if p is not None]
+    assert len(global_paths) == int((~world.geometry.is_empty).sum()), "全球底图读到了区域底图的路径"
+    assert len(local_paths) < len(global_paths), "区域底图沿用了全球底图的路径"
+    coords, _, _ = _path_arrays(world_local.geometry.values)
+    assert np.array_equal(np.concatenate([p.vertices for p in local_paths]), coords), \
+        "区域底图的路径不是局部投影坐标"
+
+
+def check_hexbin():
+    """pvplot.hexbin.aggregate 与 ax.hexbin(reduce_C_function=np.sum, mincnt=1) 的中心与数值相同"""
+    import matplotlib.pyplot as plt
+    from pvplot.hexbin import aggregate, hex_centers
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 3e6, 20000)
+    y = rng.normal(0, 1.5e6, 20000)
+    C = rng.lognormal(0, 2, 20000)
+    # C 为 NaN 的点不参与分箱, 也不参与默认范围 (含最右侧的点)
+    C[rng.random(20000) < 0.01] = np.nan
+    C[np.argmax(x)] = np.nan
+    for values in (C, None):
+        fig, ax = plt.subplots()
+        try:
+            hb = ax.hexbin(x, y, C=values, gridsize=60, reduce_C_function=np.sum, mincnt=1)
+            expected_offsets, expected = hb.get_offsets(), np.asarray(hb.get_array())
+        finally:
+            plt.close(fig)
+        bins = aggregate(x, y, values, gridsize=60, mincnt=1)
+        assert len(bins.ids) == len(expected), f"六边形数不同: {len(bins.ids)} != {len(expected)}"
+        assert np.allclose(hex_centers(bins.grid, bins.ids), expected_offsets), "六边形中心不同"
+        assert np.allclose(bins.sums, expected), "六边形数值不同"
+
+
+def check_classify():
+    """pvplot.classify.classify 与 mapclassify UserDefined 的分级编号相同 (含恰在断点上的值)"""
+    import mapclassify
+    from pvplot.classify import classify
+
+    rng = np.random.default_rng(0)
+    bins = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+    values = np.concatenate([rng.uniform(0.1, 1.1, 10000), bins])
+    expected = mapclassify.UserDefined(values, bins).yb
+    assert np.array_equal(classify(values, bins), expected), "分级编号与 mapclassify 不同"
+    assert classify([np.nan], bins)[0] == -1, "NaN 的分级编号应为 -1"
+
+
+def check_smoothing():
+    """pvplot.smoothing.smooth_columns 与原逐列 make_interp_spline + np.maximum(..., 0) 结果相同"""
+    from scipy.interpolate import make_interp_spline
+    from pvplot.smoothing import smooth_columns
+
+    rng = np.random.default_rng(0)
+    x = np.arange(800, 2400, 50, dtype=float)
+    columns = {}
+    for i in range(8):
+        y = rng.gamma(2, 50, len(x))
+        y[rng.random(len(x)) < (0.2 if i % 2 else 0)] = np.nan  # 有效点位置不同的列分组拟合
+        columns[f"c{i}"] = y
+    columns["short"] = np.where(np.arange(len(x)) < 3, 1.0, np.nan)
+
+    result = smooth_columns(x, columns, method="spline")
+    for name, y in columns.items():
+        mask = ~np.isnan(y)
+        if len(x[mask]) <= 3:
+            assert result[name] is None, f"{name}: 有效点不超过 3 个时应跳过"
+            continue
+        x_smooth = np.linspace(x[mask].min(), x[mask].max(), 300)
+        y_smooth = np.maximum(make_interp_spline(x[mask], y[mask], k=3)(x_smooth), 0)
+        assert np.array_equal(result[name][0], x_smooth), f"{name}: 求值网格不同"
+        assert np.allclose(result[name][1], y_smooth, rtol=1e-9, atol=1e-9), f"{name}: 平滑结果不同"
+
+
+CHECKS = {
+    "region_basemap": check_region_basemap,
+    "hexbin": check_hexbin,
+    "classify": check_classify,
+    "smoothing": check_smoothing,
+}
+
+
+def run_checks(names=None):
+    """依次运行检查, 返回失败的检查名"""
+    failed = []
+    for name in names or CHECKS:
+        try:
+            CHECKS[name]()
+        except AssertionError as e:
+            print(f"FAIL  {name}: {e}")
+            failed.append(name)
+        else:
+            print(f"ok    {name}")
+    return failed
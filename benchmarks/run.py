@@ -0,0 +1,191 @@
+"""
+渲染基准测试: 在合成数据上逐个运行各图的完整流程, 记录每个阶段的墙钟时间与峰值 RSS
+以及输出文件大小, 结果写成 JSON 便于不同提交之间对比
+
+    python benchmarks/run.py --resolution 0.25 --out benchmarks/results/$(git rev-parse --short HEAD).json
+    python benchmarks/run.py --pipelines fig1:总量 drawmap --cache warm
+    python benchmarks/run.py --check          # 只运行一致性检查 (见 benchmarks/checks.py)
+
+每个流程在独立子进程中运行 (峰值内存互不影响); cold 使用空缓存目录, warm 复用同一流程 cold 运行留下的缓存。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+PIPELINES = ["fig1:分布式", "fig1:集中式", "fig1:总量", "drawmap", "drawmapV2", "drawnation"]
+
+
+def _run_pipeline(name):
+    """在当前进程 (工作目录为合成数据根目录) 运行一个流程, 返回输出文件列表"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from pvplot.profiling import stage
+
+    if name.startswith("fig1:"):
+        from Fig1 import draw_map_bar as module
+        pv_type = name.split(":", 1)[1]
+        with stage("load"):
+            world_map, gdf = module.load_layers()
+        with stage("render"):
+            return [module.render(world_map, gdf, pv_type, module.output_name(pv_type))]
+    if name in ("drawmap", "drawmapV2"):
+        module = __import__(f"Fig2.{name}", fromlist=["render"])
+        output = os.path.join("exported_plots", f"{name}.pdf")
+        os.makedirs("exported_plots", exist_ok=True)
+        with stage("load"):
+            world_gdf, solar_gdf = module.load_layers()
+        with stage("render"):
+            return [module.render(world_gdf, solar_gdf, output)]
+    if name == "drawnation":
+        from Fig2 import drawnation as module
+        with stage("render"):
+            return module.export_distribution_plots(module.EXCEL_FILE, workers=1)
+    raise ValueError(f"未知的流程: {name}, 可选 {PIPELINES}")
+
+
+def child(name, result_path):
+    from pvplot.profiling import collect, records, stage
+
+    collect()
+    start = time.perf_counter()
+    with stage(name):
+        outputs = _run_pipeline(name)
+    stages = records()
+    # 内层阶段会重置 VmHWM, 整个流程的峰值取顶层阶段的记录 (已并入各子阶段的峰值)
+    top = next(r for r in reversed(stages) if r["stage"] == name)
+    result = {
+        "pipeline": name,
+        "wall_s": round(time.perf_counter() - start, 4),
+        "peak_rss_mb": top["peak_rss_mb"],
+        "outputs": {p: os.path.getsize(p) for p in outputs},
+        "stages": stages,
+    }
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run_child(root, name, env):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+        result_path = tmp.name
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, result_path],
+                          cwd=root, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f"{name} 失败")
+    with open(result_path, encoding="utf-8") as f:
+        result = json.load(f)
+    os.unlink(result_path)
+    return result
+
+
+def run(root, pipelines, cache_modes, cache_dir):
+    """每个流程先以空缓存运行 (cold), 再复用其缓存运行 (warm); 只要 warm 时 cold 一次不计入结果"""
+    runs = []
+    env = dict(os.environ, PVPLOT_CACHE=cache_dir, MPLBACKEND="Agg")
+    for name in pipelines:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        for mode in ["cold", "warm"]:
+            if mode not in cache_modes:
+                if mode == "cold" and "warm" in cache_modes:
+                    _run_child(root, name, env)
+                continue
+            result = _run_child(root, name, env)
+            result["cache"] = mode
+            runs.append(result)
+            print(f"{name:<14} {mode:<5} {result['wall_s']:>8.2f}s  {result['peak_rss_mb']:>8.1f} MB  "
+                  f"{sum(result['outputs'].values()) / 1024:>8.0f} KB")
+    return runs
+
+
+def check(root, cache_dir, names, cleanup=False):
+    """在 root 下以空缓存运行一致性检查"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from benchmarks.checks import run_checks
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.environ["PVPLOT_CACHE"] = cache_dir
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        failed = run_checks(names)
+    finally:
+        os.chdir(cwd)
+        if cleanup:
+            shutil.rmtree(root, ignore_errors=True)
+    if failed:
+        raise SystemExit(f"{len(failed)} 项检查失败: {', '.join(failed)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="各图渲染流程的分阶段基准测试")
+    parser.add_argument("--data", default=None, help="数据根目录 (含 data/ 与 Fig*/excel), 默认生成合成数据")
+    parser.add_argument("--resolution", type=float, default=0.5, help="合成网格边长 (度), 0.1 约为 10km")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--pipelines", nargs="+", default=PIPELINES)
+    parser.add_argument("--cache", choices=["cold", "warm", "both"], default="both")
+    parser.add_argument("--keep", action="store_true", help="保留生成的合成数据目录")
+    parser.add_argument("--out", default=None, help="结果 JSON, 默认 benchmarks/results/<commit>.json")
+    parser.add_argument("--check", nargs="*", default=None, metavar="NAME",
+                        help="只运行一致性检查 (默认全部), 有失败时返回非零")
+    parser.add_argument("--child", nargs=2, metavar=("PIPELINE", "RESULT"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child(*args.child)
+
+    root = args.data
+    cells = None
+    if root is None:
+        from benchmarks.synth import generate
+        root = tempfile.mkdtemp(prefix="pvbench_")
+        cells = generate(root, args.resolution, args.seed)
+        print(f"合成数据: {cells} 个网格单元 -> {root}")
+    root = os.path.abspath(root)
+    cache_dir = os.path.join(root, ".cache", "pvplot")
+    if args.check is not None:
+        return check(root, cache_dir, args.check, cleanup=args.data is None and not args.keep)
+    modes = ["cold", "warm"] if args.cache == "both" else [args.cache]
+
+    commit = _git_commit()
+    result = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "data": args.data,
+            "resolution": None if args.data else args.resolution,
+            "cells": cells,
+        },
+        "runs": run(root, args.pipelines, modes, cache_dir),
+    }
+    out = args.out or os.path.join(REPO, "benchmarks", "results", f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=1)
+    print(f"结果 -> {out}")
+    if args.data is None and not args.keep:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
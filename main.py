@@ -1,5 +1,381 @@
-def main():
-    print("Hello from pvplot!")
+"""
+pvplot 命令行入口: 在同一进程内渲染全部图, 已投影图层只加载一次并在各图之间共享
+
+    python main.py list
+    python main.py render fig1 --pvtype 总量
+    python main.py render fig1 --formats pdf svg png -j 4
+    python main.py render all            # 只重绘输入 / 参数 / 代码有变化的图
+    python main.py render all --force
+    python main.py --profile trace,cprofile render fig2     # 输出图旁写时间线 / cProfile 报告
+    python main.py tiles fig1 fig2 --scheme robinson --max-zoom 4
+    python main.py regions China Germany --bbox 100 20 125 45 -j 4    # 区域图 (局部 LAEA 投影)
+    python main.py serve fig1 fig2 --config figures.json     # 常驻进程, 脚本 / 参数文件变化时自动重绘
+    python main.py variants fig2 --only coarse warm -j 2      # figures.toml 中的样式变体批量渲染
+"""
+import argparse
+import importlib
+import os
+import time
+
+# 图名 -> (模块, 说明); 模块在真正渲染时才导入
+FIGURES = {
+    "fig1": ("Fig1.draw_map_bar", "全球光伏面积六边形图 + 区域柱状图 (分布式 / 集中式 / 总量)"),
+    "fig2": ("Fig2.drawmap", "光照强度填色 + 光伏总面积散点"),
+    "fig2v2": ("Fig2.drawmapV2", "V2: 光照强度填色 + 分布式 PV 散点 + 条形图例"),
+    "nations": ("Fig2.drawnation", "各国装机量 - 光照分布曲线"),
+}
+
+# drawmap 与 drawmapV2 单独运行时写同一个文件, 批量渲染时给 V2 单独命名
+FIG2V2_OUTPUT = "exported_plots/solar_visualization_v2.pdf"
+
+PV_TYPES = ["分布式", "集中式", "总量"]
+
+
+def _check(args, target, outputs, inputs, params, code):
+    """增量构建检查: 需要重绘时返回 (指纹, 各项明细), 否则返回 None"""
+    from pvplot.build import fingerprint, is_fresh, stale_reason
+
+    fp, parts = fingerprint(inputs, params, code)
+    if not args.force and is_fresh(args.state, target, fp, outputs):
+        print(f"[{target}] 输入与参数未变, 跳过")
+        return None
+    print(f"[{target}] 需要重绘 ({', '.join(stale_reason(args.state, target, parts))})")
+    return fp, parts
+
+
+def _record(args, target, check, outputs):
+    from pvplot.build import record, save_state
+
+    record(args.state, target, check[0], outputs, check[1])
+    save_state(args.state)
+
+
+def _params(module, *names, **extra):
+    params = {name: getattr(module, name) for name in names}
+    params.update(extra)
+    return params
+
+
+def _solar_inputs(module):
+    """图脚本可能用到的全部光伏网格文件 (各分辨率)"""
+    from pvplot.levels import native_levels
+    return list(native_levels(module.solar_sources).values())
+
+
+def render_fig1(args):
+    module = importlib.import_module("Fig1.draw_map_bar")
+    inputs = _solar_inputs(module) + [module.world_shp, module.excel_path]
+    checks = {}
+    for pv_type in args.pvtype:
+        for fmt in args.formats:
+            target = f"fig1:{pv_type}:{fmt}"
+            params = _params(module, "grid_size", "chart_positions", "chart_top_n", "color_dist",
+                             "color_util", "color_single", "plot_map_bundary", "fig_width", "fig_height",
+                             "NATURE_RC", "solar_level", "BASEMAP_STYLE", "basemap_mode",
+                             pv_type=pv_type, fmt=fmt, stream=args.stream)
+            check = _check(args, target, [module.output_name(pv_type, fmt)], inputs, params,
+                           [module.__file__])
+            if check:
+                checks[(pv_type, fmt)] = (target, check)
+    if not checks:
+        return []
+
+    jobs = list(checks)
+    if args.stream:
+        # 分块读取网格并直接累加分箱, 不加载整个光伏图层
+        world_map, _ = module.load_layers(solar=False)
+        binned = {pv_type: module.stream_bins(pv_type) for pv_type in {job[0] for job in jobs}}
+        outputs = [module.render(world_map, None, pv_type, module.output_name(pv_type, fmt),
+                                 binned=binned[pv_type]) for pv_type, fmt in jobs]
+        for job, output in zip(jobs, outputs):
+            _record(args, checks[job][0], checks[job][1], [output])
+        return outputs
+
+    world_map, gdf = module.load_layers()
+    if len(jobs) == 1:
+        pv_type, fmt = jobs[0]
+        outputs = [module.render(world_map, gdf, pv_type, module.output_name(pv_type, fmt))]
+    else:
+        outputs = module.render_batch(world_map, gdf, workers=args.jobs, jobs=jobs)
+    for job, output in zip(jobs, outputs):
+        _record(args, checks[job][0], checks[job][1], [output])
+    return outputs
+
+
+def _render_map(args, module_name, target, output_path, param_names):
+    module = importlib.import_module(module_name)
+    # 目前只有 drawmap 支持流式读取
+    stream = args.stream and hasattr(module, "stream_layers")
+    params = _params(module, *param_names, "solar_level", "BASEMAP_STYLE", "basemap_mode",
+                     "nature_double_col_width", aspect=module.STYLE.aspect, stream=stream)
+    check = _check(args, target, [output_path], _solar_inputs(module) + [module.world_path],
+                   params, [module.__file__])
+    if not check:
+        return []
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if stream:
+        world_gdf, _ = module.load_layers(solar=False)
+        outputs = [module.render(world_gdf, None, output_path, streamed=module.stream_layers())]
+    else:
+        world_gdf, solar_gdf = module.load_layers()
+        outputs = [module.render(world_gdf, solar_gdf, output_path)]
+    _record(args, target, check, outputs)
+    return outputs
+
+
+def render_fig2(args):
+    module = importlib.import_module("Fig2.drawmap")
+    return _render_map(args, "Fig2.drawmap", "fig2", module.output_path,
+                       ["custom_bins", "custom_colors", "raster_dpi", "NATURE_RC"])
+
+
+def render_fig2v2(args):
+    return _render_map(args, "Fig2.drawmapV2", "fig2v2", FIG2V2_OUTPUT,
+                       ["custom_bins", "custom_colors", "legend_labels", "raster_dpi", "NATURE_RC"])
+
+
+def render_nations(args):
+    module = importlib.import_module("Fig2.drawnation")
+    countries = args.countries or module.COUNTRIES
+    output_dir = "exported_plots/nationsFig2"
+    expected = {
+        "separate": [os.path.join(output_dir, f"{c}_distribution.pdf") for c in countries],
+        "multipage": [os.path.join(output_dir, "distribution_all.pdf")],
+        "grid": [os.path.join(output_dir, "distribution_grid.pdf")],
+    }[args.layout]
+    map_module = importlib.import_module("Fig2.drawmap")
+    # --countries Global 读取全球汇总表 SolarDistributedAll.xlsx
+    excel = module.GLOBAL_EXCEL_FILE if countries == [module.GLOBAL] else module.EXCEL_FILE
+    inputs = [map_module.solar_path, map_module.world_path] if args.from_grid else [excel]
+    params = _params(module, "COLOR_CENTRAL", "COLOR_DISTRIB", "FILL_ALPHA", "NATURE_RC", "PANEL_SIZE",
+                     countries=countries, layout=args.layout, smoothing=args.smoothing,
+                     from_grid=args.from_grid)
+    target = f"nations:{args.layout}"
+    check = _check(args, target, expected, inputs, params, [module.__file__])
+    if not check:
+        return []
+
+    if args.from_grid:
+        # 直接由网格统计, 不依赖手工整理的 Excel (只用质心, 读取点图层)
+        world_gdf, solar_gdf = map_module.load_layers(points=True)
+        source = module.grid_distribution_table(solar_gdf, world_gdf, countries)
+    else:
+        source = excel
+    outputs = module.export_distribution_plots(source, output_dir, countries=countries,
+                                               layout=args.layout, workers=args.jobs,
+                                               smoothing=args.smoothing)
+    _record(args, target, check, outputs)
+    return outputs
+
+
+RENDERERS = {
+    "fig1": render_fig1,
+    "fig2": render_fig2,
+    "fig2v2": render_fig2v2,
+    "nations": render_nations,
+}
+
+
+def cmd_list(args):
+    for name, (module, desc) in FIGURES.items():
+        print(f"{name:<10} {module:<20} {desc}")
+
+
+def cmd_render(args):
+    from pvplot.build import load_state
+
+    args.state = load_state()
+    names = list(FIGURES) if "all" in args.figures else args.figures
+    for name in names:
+        start = time.perf_counter()
+        outputs = RENDERERS[name](args)
+        if outputs:
+            print(f"[{name}] {time.perf_counter() - start:.1f}s -> {', '.join(outputs)}")
+
+
+def cmd_serve(args):
+    import traceback
+
+    from pvplot.build import load_state
+    from pvplot.profiling import reset as reset_records
+    from pvplot.serve import Watcher, apply_overrides, load_overrides, module_file, reload_module
+    from pvplot.spec import spec_path
+
+    names = list(FIGURES) if "all" in args.figures else args.figures
+    modules = {name: FIGURES[name][0] for name in names}
+    watcher = Watcher([module_file(m) for m in dict.fromkeys(modules.values())] + [args.config, spec_path()])
+    args.state = load_state()
+    print(f"[serve] 监视 {', '.join(watcher.paths)} (Ctrl+C 退出)")
+
+    pending, stale = list(names), set()
+    try:
+        while True:
+            if pending:
+                # 阶段记录只保留本轮 (常驻进程中不累积)
+                reset_records()
+                try:
+                    overrides = load_overrides(args.config)
+                    for name, module_name in modules.items():
+                        module = reload_module(module_name) if module_name in stale \
+                            else importlib.import_module(module_name)
+                        apply_overrides(module, overrides.get(name, {}))
+                    for name in pending:
+                        start = time.perf_counter()
+                        outputs = RENDERERS[name](args)
+                        if outputs:
+                            print(f"[{name}] {time.perf_counter() - start:.1f}s -> {', '.join(outputs)}")
+                except Exception:
+                    # 脚本或参数文件写错时打印错误, 继续等待下一次修改
+                    traceback.print_exc()
+                pending, stale = [], set()
+            time.sleep(args.interval)
+            changed = watcher.changed()
+            if (args.config and args.config in changed) or spec_path() in changed:
+                # 参数文件或 figures.toml 变化: 全部模块重新执行 (重新编译样式), 去掉已删除的覆盖值
+                stale = set(modules.values())
+            stale |= {m for m in modules.values() if module_file(m) in changed}
+            pending = [name for name in names if modules[name] in stale]
+    except KeyboardInterrupt:
+        print("[serve] 退出")
+
+
+def cmd_variants(args):
+    from pvplot.spec import variant_names
+
+    module = importlib.import_module(FIGURES[args.figure][0])
+    available = variant_names(args.figure)
+    names = args.only or available
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise SystemExit(f"[variants] {args.figure} 没有变体 {unknown}, 可选 {available}")
+    start = time.perf_counter()
+    world_gdf, solar_gdf = module.load_layers()
+    outputs = module.render_variants(world_gdf, solar_gdf, args.out, names, args.formats, workers=args.jobs)
+    print(f"[variants] {time.perf_counter() - start:.1f}s -> {len(outputs)} 个文件 ({args.out})")
+
+
+def cmd_tiles(args):
+    from pvplot.tiles import export_tiles, write_viewer
+
+    out_dir = args.out or os.path.join("exported_plots", "tiles", args.scheme)
+    layers = {}
+    if "fig1" in args.figures:
+        module = importlib.import_module("Fig1.draw_map_bar")
+        layers.update(module.tile_layers(args.pvtype, args.scheme, args.max_zoom, args.min_zoom))
+    if "fig2" in args.figures:
+        module = importlib.import_module("Fig2.drawmap")
+        layers.update(module.tile_layers(args.scheme, args.max_zoom, args.min_zoom))
+
+    start = time.perf_counter()
+    counts = export_tiles(out_dir, layers, workers=args.jobs)
+    viewer = write_viewer(out_dir, layers, args.max_zoom, args.scheme)
+    for name, n in counts.items():
+        print(f"[tiles] {name}: {n} 个瓦片")
+    print(f"[tiles] {time.perf_counter() - start:.1f}s -> {viewer}")
+
+
+def cmd_regions(args):
+    module = importlib.import_module("Fig2.drawmap")
+    nations = importlib.import_module("Fig2.drawnation")
+    countries = args.countries if args.countries or args.bbox else nations.COUNTRIES
+    start = time.perf_counter()
+    world_gdf, _ = module.load_layers(solar=False)
+    regions = module.make_regions(world_gdf, countries, args.bbox or [])
+    solar_gdf = module.region_solar(world_gdf, regions, args.width)
+    outputs = module.render_regions(world_gdf, solar_gdf, regions, args.out, args.formats,
+                                    workers=args.jobs, width_mm=args.width)
+    print(f"[regions] {time.perf_counter() - start:.1f}s -> {len(outputs)} 个文件 ({args.out})")
+
+
+def _add_render_options(parser):
+    """render 与 serve 共用的渲染参数"""
+    parser.add_argument("--pvtype", nargs="+", choices=PV_TYPES, default=PV_TYPES,
+                        help="Fig1 的绘图模式, 默认三种全部渲染")
+    parser.add_argument("--formats", nargs="+", choices=["pdf", "svg", "png"], default=["pdf"],
+                        help="Fig1 输出格式, 多个组合时在进程池中并行渲染")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="并行进程数, 默认取 CPU 核数; 1 为顺序执行")
+    parser.add_argument("--countries", nargs="+", default=None,
+                        help="nations 图的国家列表, 默认为 drawnation.COUNTRIES")
+    parser.add_argument("--from-grid", action="store_true",
+                        help="nations 图直接由 10km 网格按国家统计, 而非读取 Excel")
+    parser.add_argument("--layout", choices=["separate", "multipage", "grid"], default="separate",
+                        help="nations 图导出方式: 每国一个 PDF / 多页 PDF / 拼图")
+    parser.add_argument("--smoothing", choices=["spline", "pchip"], default="spline",
+                        help="nations 曲线平滑: 三次样条 (截断负值) 或保形 PCHIP")
+    parser.add_argument("--stream", action="store_true",
+                        help="fig1 / fig2 分块流式读取光伏网格 (超大网格), 内存只与输出分辨率有关")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pvplot", description="PVplotHub 图件渲染")
+    parser.add_argument("--profile", default=None, metavar="KINDS",
+                        help="逗号分隔的 trace / cprofile / tracemalloc / size (或 all), "
+                             "等同于设置环境变量 PVPLOT_PROFILE")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_list = sub.add_parser("list", help="列出可渲染的图")
+    p_list.set_defaults(func=cmd_list)
+
+    p_render = sub.add_parser("render", help="渲染一张或多张图 (共享已加载的图层)")
+    p_render.add_argument("figures", nargs="+", choices=[*FIGURES, "all"])
+    _add_render_options(p_render)
+    p_render.add_argument("--force", action="store_true",
+                          help="忽略增量构建记录, 全部重绘")
+    p_render.set_defaults(func=cmd_render)
+
+    p_serve = sub.add_parser("serve", help="常驻渲染进程: 图脚本或参数覆盖文件变化时只重绘受影响的图")
+    p_serve.add_argument("figures", nargs="+", choices=[*FIGURES, "all"])
+    p_serve.add_argument("--config", default=None,
+                         help="JSON 参数覆盖文件 {图名: {参数: 值}}, 修改后自动重绘 (见 pvplot.serve)")
+    p_serve.add_argument("--interval", type=float, default=0.5, help="轮询间隔 (秒)")
+    _add_render_options(p_serve)
+    p_serve.set_defaults(func=cmd_serve, force=False)
+
+    p_variants = sub.add_parser("variants", help="批量渲染 figures.toml 中的样式变体 (共用已加载的图层与栅格)")
+    p_variants.add_argument("figure", choices=["fig2", "fig2v2"])
+    p_variants.add_argument("--only", nargs="+", default=None, help="只渲染这些变体, 默认全部")
+    p_variants.add_argument("--formats", nargs="+", choices=["pdf", "svg", "png"], default=["pdf"])
+    p_variants.add_argument("-j", "--jobs", type=int, default=None)
+    p_variants.add_argument("--out", default="exported_plots/variants")
+    p_variants.set_defaults(func=cmd_variants)
+
+    p_tiles = sub.add_parser("tiles", help="导出 z/x/y PNG 瓦片金字塔与浏览页")
+    p_tiles.add_argument("figures", nargs="+", choices=["fig1", "fig2"])
+    p_tiles.add_argument("--scheme", choices=["robinson", "webmercator"], default="robinson")
+    p_tiles.add_argument("--max-zoom", type=int, default=4,
+                         help="最高缩放级别 (瓦片 256px, 4 级约 8km / 像元)")
+    p_tiles.add_argument("--min-zoom", type=int, default=0)
+    p_tiles.add_argument("--pvtype", nargs="+", choices=PV_TYPES, default=PV_TYPES)
+    p_tiles.add_argument("-j", "--jobs", type=int, default=None)
+    p_tiles.add_argument("--out", default=None, help="输出目录, 默认 exported_plots/tiles/<scheme>")
+    p_tiles.set_defaults(func=cmd_tiles)
+
+    p_regions = sub.add_parser("regions", help="国家 / 经纬度范围的区域图 (Fig2 配色, 局部 LAEA 投影)")
+    p_regions.add_argument("countries", nargs="*",
+                           help="世界国家地图中的国家名, 不给出国家与 --bbox 时为 drawnation.COUNTRIES")
+    p_regions.add_argument("--bbox", nargs=4, type=float, action="append", metavar=("MINX", "MINY", "MAXX", "MAXY"),
+                           help="经纬度范围, 可重复")
+    p_regions.add_argument("--formats", nargs="+", choices=["pdf", "svg", "png"], default=["pdf"])
+    p_regions.add_argument("--width", type=float, default=60, help="单幅宽度 (mm)")
+    p_regions.add_argument("-j", "--jobs", type=int, default=None)
+    p_regions.add_argument("--out", default="exported_plots/regions")
+    p_regions.set_defaults(func=cmd_regions)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        from pvplot.profiling import PROFILE_ENV
+        # 写入环境变量, 进程池中的子进程同样生效
+        os.environ[PROFILE_ENV] = args.profile
+    args.func(args)
+    from pvplot.profiling import enabled, write_trace
+    if enabled("trace"):
+        # 整个命令 (含图层加载) 的时间线
+        os.makedirs("exported_plots", exist_ok=True)
+        print(f"时间线: {write_trace(os.path.join('exported_plots', f'{args.command}.trace.json'))}")
 
 
 if __name__ == "__main__":
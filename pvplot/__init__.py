@@ -0,0 +1,3 @@
+"""
+pvplot 共享组件: 数据加载、缓存与绘图工具 (供 Fig1 / Fig2 脚本复用)
+"""
@@ -0,0 +1,156 @@
+"""
+底图模板: 世界底图 (数千个国家多边形) 只转换一次, 各图 / 各变体直接叠加
+
+    draw_basemap(ax, world_gdf, BASEMAP_STYLE)                       # 矢量 (默认)
+    draw_basemap(ax, world_gdf, BASEMAP_STYLE, mode="raster", width_px=2126, dpi=300)
+
+vector: 多边形 -> matplotlib Path 的转换结果按图层缓存 (进程内 + 磁盘 npz),
+        每张图只新建一个 PathCollection, 与 GeoDataFrame.plot 的输出一致
+raster: 按 (图层, 样式, 范围, 像素) 把样式化的底图预先渲染成 RGBA 栅格并缓存,
+        之后每张图只有一次 imshow (适合 PNG 预览 / 大批量变体, PDF 中底图不再是矢量)
+"""
+import os
+
+import numpy as np
+import shapely
+
+from pvplot.cache import cache_path, make_key, save_array, save_arrays
+
+# 底图样式的默认值 (与 GeoDataFrame.plot 参数同名)
+DEFAULT_STYLE = {"facecolor": "#e0e0e0", "edgecolor": "white", "linewidth": 0.3}
+
+BASEMAP_MODES = ["vector", "raster"]
+
+# 缓存格式变化时递增
+BASEMAP_VERSION = 2
+
+# 进程内缓存
+_PATHS = {}
+_IMAGES = {}
+
+
+def _path_arrays(geoms):
+    """
+    多边形 (含 MultiPolygon / 洞) -> (顶点, Path 代码, 每个几何对象的顶点起始偏移)
+    全部环一次性取坐标, 环首为 MOVETO, 环尾为 CLOSEPOLY
+    """
+    from matplotlib.path import Path
+
+    parts, part_geom = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+    codes = np.full(len(coords), Path.LINETO, dtype=np.uint8)
+    if len(coords):
+        starts = np.flatnonzero(np.r_[True, coord_ring[1:] != coord_ring[:-1]])
+        ends = np.r_[starts[1:] - 1, len(coords) - 1]
+        codes[starts] = Path.MOVETO
+        codes[ends] = Path.CLOSEPOLY
+    coord_geom = part_geom[ring_part[coord_ring]]
+    offsets = np.searchsorted(coord_geom, np.arange(len(geoms) + 1))
+    return coords, codes, offsets
+
+
+def _layer_key(world):
+    """
+    底图图层的缓存键: attrs 中的 cache_key + CRS + 行数 + 范围
+    (iloc / to_crs 得到的子集或重投影图层沿用原 attrs, 只看 cache_key 会与原图层混用)
+    """
+    data_key = world.attrs.get("cache_key")
+    if not data_key:
+        return None
+    crs = world.crs.to_string() if world.crs is not None else None
+    return make_key(data_key, crs, len(world), [float(v) for v in world.total_bounds])
+
+
+def cached_paths(world):
+    """world 各行的 matplotlib Path (空几何为 None); 带 cache_key 的图层按键缓存到磁盘"""
+    from matplotlib.path import Path
+
+    data_key = _layer_key(world)
+    key = make_key("basemap_paths", data_key, BASEMAP_VERSION) if data_key else None
+    if key in _PATHS:
+        return _PATHS[key]
+
+    path = cache_path("basemap", f"{key}.npz") if key else None
+    if path and os.path.exists(path):
+        with np.load(path) as npz:
+            coords, codes, offsets = npz["coords"], npz["codes"], npz["offsets"]
+    else:
+        coords, codes, offsets = _path_arrays(world.geometry.values)
+        if path:
+            save_arrays(path, coords=coords, codes=codes, offsets=offsets)
+    paths = [Path(coords[a:b], codes[a:b]) if b > a else None for a, b in zip(offsets[:-1], offsets[1:])]
+    if key:
+        _PATHS[key] = paths
+    return paths
+
+
+def basemap_collection(world, style=None, zorder=None):
+    """新的 PathCollection (artist 不能在多张图之间共享, Path 对象可以)"""
+    from matplotlib.collections import PathCollection
+
+    style = {**DEFAULT_STYLE, **(style or {})}
+    paths = [p for p in cached_paths(world) if p is not None]
+    return PathCollection(paths, facecolors=style["facecolor"], edgecolors=style["edgecolor"],
+                          linewidths=style["linewidth"], zorder=zorder)
+
+
+def _layer_extent(world):
+    minx, miny, maxx, maxy = world.total_bounds
+    return (float(minx), float(maxx), float(miny), float(maxy))
+
+
+def basemap_image(world, style=None, width_px=2000, dpi=300, extent=None):
+    """
+    样式化底图的 RGBA 栅格 (行自上而下) 与其范围; 线宽按 dpi 换算为像素, 与同 dpi 保存的矢量底图一致
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    style = {**DEFAULT_STYLE, **(style or {})}
+    extent = extent or _layer_extent(world)
+    xmin, xmax, ymin, ymax = extent
+    height_px = max(1, int(round(width_px * (ymax - ymin) / (xmax - xmin))))
+    data_key = _layer_key(world)
+    key = make_key("basemap_image", data_key, style, list(extent), width_px, dpi,
+                   BASEMAP_VERSION) if data_key else None
+    if key in _IMAGES:
+        return _IMAGES[key], extent
+
+    path = cache_path("basemap", f"{key}.npy") if key else None
+    if path and os.path.exists(path):
+        image = np.load(path)
+    else:
+        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        ax.add_collection(basemap_collection(world, style))
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        canvas.draw()
+        image = np.asarray(canvas.buffer_rgba()).copy()
+        if path:
+            save_array(path, image)
+    if key:
+        _IMAGES[key] = image
+    return image, extent
+
+
+def draw_basemap(ax, world, style=None, mode="vector", zorder=None, width_px=None, dpi=300):
+    """
+    在 ax 上绘制底图; 坐标轴范围与纵横比的处理与 GeoDataFrame.plot 相同
+    mode="raster" 时需给出 width_px (通常与数据栅格相同)
+    """
+    if mode == "vector":
+        artist = ax.add_collection(basemap_collection(world, style, zorder=zorder), autolim=True)
+        ax.autoscale_view()
+    elif mode == "raster":
+        image, extent = basemap_image(world, style, width_px, dpi)
+        artist = ax.imshow(image, extent=extent, origin="upper", interpolation="nearest", zorder=zorder)
+        ax.update_datalim([(extent[0], extent[2]), (extent[1], extent[3])])
+        ax.autoscale_view()
+    else:
+        raise ValueError(f"未知的底图模式: {mode}, 可选 {BASEMAP_MODES}")
+    ax.set_aspect("equal")
+    return artist
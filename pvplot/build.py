@@ -0,0 +1,93 @@
+"""
+增量构建: 记录每个输出图的指纹 (输入文件 + 参数 + rcParams + 代码),
+指纹未变且输出文件仍在时跳过该图
+
+中间结果 (投影图层 / 六边形分箱 / 光照栅格 / 国家归属) 本身按内容键缓存在
+.cache/pvplot 下, 某一图需要重绘时也只重算失效的那部分阶段; 这些键完全由输入、参数与代码决定,
+因此不单独计入指纹
+"""
+import glob
+import json
+import os
+
+from pvplot.cache import cache_dir, cache_path, file_digest, make_key, shapefile_digest
+
+STATE_FILE = "build_state.json"
+
+# pvplot 自身的代码也参与指纹 (分箱 / 栅格化逻辑变化时应重绘)
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _state_path():
+    return os.path.join(cache_dir(), STATE_FILE)
+
+
+def load_state():
+    path = _state_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    path = cache_path(STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def input_digests(paths):
+    """输入文件 -> 内容哈希 (Shapefile 取全部组成文件), 缺失的文件记为 None"""
+    digests = {}
+    for path in paths:
+        if not os.path.exists(path):
+            digests[path] = None
+        elif path.lower().endswith(".shp"):
+            digests[path] = shapefile_digest(path)
+        else:
+            digests[path] = file_digest(path)
+    return digests
+
+
+def code_digests(paths):
+    """图脚本与 pvplot 包源码的哈希"""
+    files = list(paths) + sorted(glob.glob(os.path.join(PACKAGE_DIR, "*.py")))
+    return {os.path.relpath(p, os.path.dirname(PACKAGE_DIR)): file_digest(p) for p in files}
+
+
+def fingerprint(inputs=(), params=None, code=()):
+    """
+    inputs: 输入文件路径; params: 图参数 (需可 JSON 序列化, 含 rcParams);
+    code: 图脚本路径
+    """
+    parts = {
+        "inputs": input_digests(inputs),
+        "params": params or {},
+        "code": code_digests(code),
+    }
+    return make_key(parts), parts
+
+
+def is_fresh(state, target, fp, outputs):
+    entry = state.get(target)
+    return bool(entry) and entry.get("fingerprint") == fp and all(os.path.exists(p) for p in outputs)
+
+
+def record(state, target, fp, outputs, parts=None):
+    state[target] = {"fingerprint": fp, "outputs": list(outputs)}
+    if parts is not None:
+        # 便于排查是哪一项导致重绘
+        state[target]["parts"] = parts
+
+
+def stale_reason(state, target, parts):
+    """与上次构建相比变化的项 (inputs / params / code)"""
+    old = (state.get(target) or {}).get("parts")
+    if not old:
+        return ["new"]
+    return [k for k in parts if old.get(k) != parts[k]]
@@ -0,0 +1,108 @@
+"""
+缓存目录与内容哈希工具 (所有中间结果共用)
+"""
+import hashlib
+import json
+import os
+
+# 缓存根目录, 可用环境变量 PVPLOT_CACHE 覆盖
+DEFAULT_CACHE_DIR = ".cache/pvplot"
+
+# Shapefile 的组成文件, 任何一个变化都应使缓存失效
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+
+def cache_dir():
+    return os.environ.get("PVPLOT_CACHE", DEFAULT_CACHE_DIR)
+
+
+def cache_path(*parts):
+    """返回缓存文件路径 (自动创建上级目录)"""
+    path = os.path.join(cache_dir(), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _replace(path, write):
+    """
+    write(f) 写入同目录下的临时文件后用 os.replace 替换 path, 读者只会看到完整文件;
+    临时文件名带进程号, 并发写同一缓存键的进程互不干扰
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_array(path, array):
+    """原子写入 .npy 缓存"""
+    import numpy as np
+    _replace(path, lambda f: np.save(f, array))
+
+
+def save_arrays(path, **arrays):
+    """原子写入 .npz 缓存"""
+    import numpy as np
+    _replace(path, lambda f: np.savez(f, **arrays))
+
+
+def _load_digest_index():
+    path = os.path.join(cache_dir(), "digests.json")
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_digest_index(index):
+    path = cache_path("digests.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def file_digest(path):
+    """
+    文件内容的 sha256
+    以 (mtime, size) 为索引记录结果, 文件未改动时不再重新读取大文件
+    """
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    index = _load_digest_index()
+    entry = index.get(key)
+    if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+        return entry[2]
+
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    index[key] = [st.st_mtime_ns, st.st_size, digest]
+    _save_digest_index(index)
+    return digest
+
+
+def shapefile_digest(shp_path):
+    """Shapefile 全部组成文件的联合哈希"""
+    stem, _ = os.path.splitext(shp_path)
+    parts = []
+    for ext in SHAPEFILE_PARTS:
+        part = stem + ext
+        if os.path.exists(part):
+            parts.append([ext, file_digest(part)])
+    if not parts:
+        raise FileNotFoundError(shp_path)
+    return make_key(parts)
+
+
+def make_key(*parts):
+    """把任意可 JSON 序列化的参数压成短哈希, 用作缓存文件名"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
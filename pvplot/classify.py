@@ -0,0 +1,82 @@
+"""
+按断点分级 (代替 geopandas scheme='UserDefined' / mapclassify): 一次 np.digitize 得到分级编号,
+分级结果按 (数据, 断点) 缓存; 图例句柄由同一组断点与颜色生成
+
+    key = field_key(solar_gdf, '光照强', width_px)          # 数据的缓存键, 无 layer_key 时为 None
+    classes = cached_classes(radiation, bins, key)        # 换断点只需重新分级一次
+    draw_classes(ax, classes, extent, cmap)
+    ax.legend(handles=patch_handles(colors, labels))
+"""
+import os
+
+import numpy as np
+
+from pvplot.cache import cache_path, make_key, save_array
+
+# 进程内缓存
+_CLASSES = {}
+
+
+def classify(values, bins):
+    """
+    分级编号, 与 mapclassify UserDefined 一致: <=bins[0] 为 0, >bins[-1] 为 len(bins)
+    NaN 为 -1
+    """
+    values = np.asarray(values, float)
+    classes = np.digitize(values, bins, right=True)
+    classes[np.isnan(values)] = -1
+    return classes
+
+
+def field_key(gdf, field, *extra):
+    """图层某字段 (及栅格分辨率等附加参数) 的缓存键; gdf 不带 attrs['layer_key'] 时为 None"""
+    layer_key = gdf.attrs.get("layer_key")
+    return None if layer_key is None else make_key(layer_key, field, *extra)
+
+
+def cached_classes(values, bins, key=None):
+    """
+    带缓存的 classify, 结果为 int8 (分级数远小于 127); key 为 values 的缓存键 (见 field_key),
+    为 None 时直接计算
+    """
+    if key is None:
+        return classify(values, bins).astype(np.int8)
+    key = make_key(key, [float(b) for b in bins])
+    if key in _CLASSES:
+        return _CLASSES[key]
+    path = cache_path("classes", f"{key}.npy")
+    if os.path.exists(path):
+        classes = np.load(path)
+    else:
+        classes = classify(values, bins).astype(np.int8)
+        save_array(path, classes)
+    _CLASSES[key] = classes
+    return classes
+
+
+def userdefined_labels(vmin, vmax, bins):
+    """与 geopandas scheme='UserDefined' 图例相同的区间标签 (数据最大值不超过末个断点时少一级)"""
+    edges = [vmin] + list(bins)
+    labels = [f"[{edges[0]:.2f}, {edges[1]:.2f}]"]
+    labels += [f"({lo:.2f}, {hi:.2f}]" for lo, hi in zip(edges[1:-1], edges[2:])]
+    if vmax > bins[-1]:
+        labels.append(f"({bins[-1]:.2f}, {vmax:.2f}]")
+    return labels
+
+
+def marker_handles(colors, labels, markersize=10):
+    """圆点图例 (geopandas 分级图例的样式)"""
+    from matplotlib.lines import Line2D
+
+    return [
+        Line2D([0], [0], linestyle="none", marker="o", markersize=markersize,
+               markerfacecolor=color, markeredgewidth=0, label=label)
+        for color, label in zip(colors, labels)
+    ]
+
+
+def patch_handles(colors, labels):
+    """条形色块图例"""
+    from matplotlib.patches import Patch
+
+    return [Patch(color=color, label=label) for color, label in zip(colors, labels)]
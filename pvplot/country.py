@@ -0,0 +1,96 @@
+"""
+网格单元 -> 国家 的空间归属 (STRtree) 与按国家的装机 - 光照分布统计
+
+归属结果按 (光伏图层, 底图) 缓存; 统计结果与 Fig2/excel/SolarDistributed.xlsx
+同构 ('光照' 列 + "{国家} 集中式" / "{国家} 分布式" 列), 可直接交给 drawnation 绘图
+"""
+import os
+
+import numpy as np
+import shapely
+
+from pvplot.cache import cache_path, make_key, save_array
+from pvplot.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# 世界国家地图中可能的国家名字段
+NAME_FIELDS = ["NAME", "name", "NAME_EN", "NAME_ENGL", "ADMIN", "COUNTRY", "CNTRY_NAME", "SOVEREIGNT"]
+
+# 统计字段 -> 表头中的类别名
+PV_COLUMNS = {"jizhong_ar": "集中式", "fenbu_area": "分布式"}
+
+# 光照分箱宽度 (MJ/m², 与 SolarDistributed.xlsx 一致)
+RADIATION_STEP = 50
+
+_ASSIGNMENTS = {}
+
+
+def name_field(world, candidates=NAME_FIELDS):
+    field = next((f for f in candidates if f in world.columns), None)
+    if not field: raise ValueError(f"国家名字段未找到: {candidates}")
+    return field
+
+
+def assign_countries(solar, world):
+    """
+    每个网格单元 (按质心 cx / cy) 所在国家在 world 中的行号, 不在任何国家内为 -1
+    两个图层须为同一投影; 结果按 (solar layer_key, world cache_key) 落盘缓存
+    """
+    solar_key = solar.attrs.get("layer_key")
+    world_key = world.attrs.get("cache_key")
+    key = make_key("country", solar_key, world_key) if solar_key and world_key else None
+    if key in _ASSIGNMENTS:
+        return _ASSIGNMENTS[key]
+
+    path = cache_path("country", f"{key}.npy") if key else None
+    if path and os.path.exists(path):
+        owner = np.load(path)
+    else:
+        tree = shapely.STRtree(world.geometry.values)
+        points = shapely.points(solar["cx"].values, solar["cy"].values)
+        cell_idx, country_idx = tree.query(points, predicate="within")
+        owner = np.full(len(solar), -1, dtype=np.int32)
+        # 边界上的点可能落入多个国家, 保留第一个
+        owner[cell_idx[::-1]] = country_idx[::-1]
+        if path:
+            save_array(path, owner)
+    if key:
+        _ASSIGNMENTS[key] = owner
+    return owner
+
+
+def country_cells(solar, world, country, field=None):
+    """某个国家内所有网格单元的行号"""
+    field = field or name_field(world)
+    rows = np.flatnonzero(world[field].values == country)
+    return np.flatnonzero(np.isin(assign_countries(solar, world), rows))
+
+
+def country_histograms(solar, world, countries, radiation="光照强", columns=PV_COLUMNS,
+                       step=RADIATION_STEP, scale=1.0, field=None):
+    """
+    按国家统计各光照区间内的 jizhong_ar / fenbu_area 之和 (乘以 scale 换算为装机量)
+    solar 应为换算后单位 (load_solar(scaled=True)); 返回与 SolarDistributed.xlsx 同构的表
+    """
+    field = field or name_field(world)
+    owner = assign_countries(solar, world)
+    names = world[field].values
+
+    valid = (owner >= 0) & solar[radiation].notna().values
+    frame = pd.DataFrame({
+        "country": names[owner[valid]],
+        "光照": (np.floor(solar[radiation].values[valid] / step) * step).astype(int),
+    })
+    for col in columns:
+        frame[col] = solar[col].values[valid] * scale
+    frame = frame[frame["country"].isin(countries)]
+
+    summed = frame.groupby(["光照", "country"])[list(columns)].sum(min_count=1)
+    table = summed.unstack("country")
+    # 没有网格的区间为 NaN (sum(min_count=1) / unstack), 容量为 0 的区间保留 0
+    table.columns = [f"{country} {columns[col]}" for col, country in table.columns]
+
+    ordered = [f"{c} {label}" for c in countries for label in columns.values()]
+    table = table.reindex(columns=[c for c in ordered if c in table.columns])
+    return table.reset_index()
@@ -0,0 +1,193 @@
+"""
+共享数据加载层: 读取 Solar_10km / 世界国家地图, 裁剪并投影到 Robinson,
+结果以 GeoParquet 缓存, 源文件 / bbox / CRS 任一变化自动失效
+
+网格质心一律在源 CRS (经纬度) 中计算, 只把质心点批量投影; 只用质心的图
+(Fig1 六边形图、点密度瓦片、按国家统计) 读取 load_points 的点图层, 多边形顶点完全不投影
+"""
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+from pvplot.cache import cache_path, make_key, shapefile_digest
+from pvplot.lazy import lazy_import
+from pvplot.profiling import stage
+
+gpd = lazy_import("geopandas")
+pd = lazy_import("pandas")
+
+# ================= 默认路径与投影 =================
+WORLD_SHP = "data/map/世界国家地图.shp"
+SOLAR_SHP = "data/10km/Solar_10km.shp"
+TARGET_CRS = "ESRI:54030"  # Robinson 投影
+
+# 各脚本原有的裁剪范围 (minx, miny, maxx, maxy), 均去掉南极
+BBOX_FIG1 = (-180, -58, 180, 90)
+BBOX_FIG2 = (-179.99, -57.99, 179.99, 89.99)
+BBOX_FIG2_V2 = (-179.9, -58, 179.9, 85)
+# 光伏网格统一按最宽的范围裁剪一次, 所有图共享同一份 (各图只对底图使用自己的 bbox)
+SOLAR_BBOX = BBOX_FIG1
+
+# 数值字段及 Fig2 使用的单位换算系数
+NUMERIC_FIELDS = {
+    "光照强": 12 / 1e6,
+    "jizhong_ar": 0.2 / 1e6,
+    "fenbu_area": 0.2 / 1e6,
+    "total_area": 0.2 / 1e6,
+}
+
+# 缓存格式变化时递增, 使旧缓存失效 (2: 质心改为在源 CRS 中计算后投影)
+CACHE_VERSION = 2
+
+# 点图层 (load_points) 的单元面积列: 投影坐标下的面积, 供 pvplot.levels 块聚合加权
+AREA_FIELD = "cell_area"
+
+# 同一进程内已加载的图层, 避免重复读取 Parquet
+_LOADED = {}
+
+
+def layer_key(kind, shp_path, bbox, target_crs):
+    """缓存键: 源文件内容 + bbox + CRS + 缓存版本"""
+    return make_key(kind, shapefile_digest(shp_path), list(bbox), target_crs, CACHE_VERSION)
+
+
+def write_parquet(gdf, path):
+    """先写临时文件再替换, 中断或并发时不会留下半个缓存文件"""
+    tmp = path + ".tmp"
+    gdf.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def project_points(x, y, source_crs, target_crs):
+    """一次批量投影点坐标"""
+    from pyproj import Transformer
+
+    t = Transformer.from_crs(source_crs, target_crs, always_xy=True)
+    return t.transform(np.asarray(x, float), np.asarray(y, float))
+
+
+def projected_centroids(geoms, source_crs, target_crs, with_area=False):
+    """
+    多边形质心在源 CRS 中计算 (shapely 2 向量化), 只把质心点一次批量投影, 不投影多边形顶点;
+    with_area=True 时同时返回投影坐标下的单元面积: 源面积 × 质心处投影的雅可比行列式
+    (有限差分, 步长取单元边长的 1/10, 与质心点同批投影)
+    """
+    centroids = shapely.centroid(geoms)
+    sx, sy = shapely.get_x(centroids), shapely.get_y(centroids)
+    if not with_area:
+        return project_points(sx, sy, source_crs, target_crs)
+
+    n = len(sx)
+    area = shapely.area(geoms)
+    step = np.sqrt(area) / 10
+    step[~(step > 0)] = 1e-3
+    # 向单元中心一侧取差分, 避免越过 ±180° / ±90°
+    hx = np.where(sx > 0, -step, step)
+    hy = np.where(sy > 0, -step, step)
+    px, py = project_points(np.concatenate([sx, sx + hx, sx]), np.concatenate([sy, sy, sy + hy]),
+                            source_crs, target_crs)
+    x, y = px[:n], py[:n]
+    jx = ((px[n:2 * n] - x) / hx, (py[n:2 * n] - y) / hx)
+    jy = ((px[2 * n:] - x) / hy, (py[2 * n:] - y) / hy)
+    return x, y, area * np.abs(jx[0] * jy[1] - jy[0] * jx[1])
+
+
+def _build_world(shp_path, bbox, target_crs):
+    with stage("read"):
+        world = gpd.read_file(shp_path)
+    with stage("clip"):
+        world = world.clip(box(*bbox))
+    with stage("reproject"):
+        return world.to_crs(target_crs)
+
+
+def _read_solar(shp_path, bbox):
+    """读取并在源 CRS 中裁剪光伏网格, 字段名小写, 数值字段转为 float (原始单位)"""
+    with stage("read"):
+        gdf = gpd.read_file(shp_path)
+    gdf.columns = [c.lower() if c != "geometry" else c for c in gdf.columns]
+    with stage("clip"):
+        gdf = gdf.clip(box(*bbox))
+    # 数值转换只做一次 (原始单位, 换算系数在加载时按需乘上)
+    for col in NUMERIC_FIELDS:
+        if col in gdf.columns:
+            gdf[col] = pd.to_numeric(gdf[col], errors="coerce")
+    return gdf.reset_index(drop=True)
+
+
+def _build_solar(shp_path, bbox, target_crs):
+    gdf = _read_solar(shp_path, bbox)
+    # 质心在源 CRS 中计算, 只投影质心点 (与 load_points 一致)
+    with stage("centroid"):
+        gdf["cx"], gdf["cy"] = projected_centroids(gdf.geometry.values, gdf.crs, target_crs)
+    with stage("reproject"):
+        return gdf.to_crs(target_crs)
+
+
+def _build_points(shp_path, bbox, target_crs):
+    """只含质心、单元面积与字段的点图层 (无几何列, 多边形不投影); 由 _load_cached 写入 parquet 缓存"""
+    gdf = _read_solar(shp_path, bbox)
+    with stage("centroid"):
+        cx, cy, area = projected_centroids(gdf.geometry.values, gdf.crs, target_crs, with_area=True)
+    out = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+    out["cx"], out["cy"], out[AREA_FIELD] = cx, cy, area
+    return out
+
+
+def _load_cached(kind, builder, shp_path, bbox, target_crs, geometry=True):
+    key = layer_key(kind, shp_path, bbox, target_crs)
+    if key in _LOADED:
+        return _LOADED[key]
+
+    path = cache_path("layers", f"{kind}_{key}.parquet")
+    with stage(f"load_{kind}"):
+        if os.path.exists(path):
+            gdf = gpd.read_parquet(path) if geometry else pd.read_parquet(path)
+        else:
+            print(f"构建缓存: {kind} -> {path}")
+            gdf = builder(shp_path, bbox, target_crs)
+            write_parquet(gdf, path)
+    # cache_key 标识字段取值, layer_key 标识几何 (换算单位后的副本共用同一 layer_key)
+    gdf.attrs["cache_key"] = key
+    gdf.attrs["layer_key"] = key
+    _LOADED[key] = gdf
+    return gdf
+
+
+def load_world(bbox=BBOX_FIG1, target_crs=TARGET_CRS, shp_path=WORLD_SHP):
+    """裁剪并投影后的世界底图"""
+    return _load_cached("world", _build_world, shp_path, bbox, target_crs)
+
+
+def load_solar(bbox=BBOX_FIG1, target_crs=TARGET_CRS, shp_path=SOLAR_SHP, scaled=False):
+    """
+    裁剪并投影后的 10km 光伏网格, 附带质心列 cx / cy
+    scaled=True 时按 NUMERIC_FIELDS 换算单位 (Fig2 口径), 返回副本
+    返回的 GeoDataFrame 为进程内共享对象, 调用方不要原地修改
+    """
+    gdf = _load_cached("solar", _build_solar, shp_path, bbox, target_crs)
+    return scaled_copy(gdf) if scaled else gdf
+
+
+def load_points(bbox=BBOX_FIG1, target_crs=TARGET_CRS, shp_path=SOLAR_SHP, scaled=False):
+    """
+    只画质心的图 (Fig1 六边形图、点密度瓦片) 用的光伏网格: DataFrame, 含字段、质心 cx / cy 与
+    投影后的单元面积 cell_area, 不含多边形; 质心在源 CRS 中计算后批量投影, 不投影任何多边形顶点
+    """
+    df = _load_cached("points", _build_points, shp_path, bbox, target_crs, geometry=False)
+    return scaled_copy(df) if scaled else df
+
+
+def scaled_copy(gdf):
+    """按 NUMERIC_FIELDS 换算单位后的副本 (进程内按 cache_key 复用, 与原图层共用 layer_key)"""
+    scaled_key = gdf.attrs["cache_key"] + ":scaled"
+    if scaled_key not in _LOADED:
+        out = gdf.copy()
+        for col, factor in NUMERIC_FIELDS.items():
+            if col in out.columns:
+                out[col] = out[col] * factor
+        out.attrs["cache_key"] = scaled_key
+        _LOADED[scaled_key] = out
+    return _LOADED[scaled_key]
@@ -0,0 +1,156 @@
+"""
+按矢量复杂度自动栅格化的保存
+
+    save_figure(fig, "out.pdf", dpi=300, bbox_inches="tight")
+
+保存前统计每个数据图层 (Collection / Line2D / Patch) 的路径数与顶点数 (散点按 标记顶点数 × 点数),
+超过预算的图层设为 rasterized, 以 dpi 嵌入为位图; 文字、坐标轴、图例与小图层 (如柱状图) 保持矢量。
+不再需要在各脚本里手工给大图层加 rasterized=True。
+
+PVPLOT_PROFILE 含 size (或 main.py --profile size) 时, 逐个隐藏图层重新保存到内存,
+得到每个图层占用的文件大小, 写入 <输出>.layers.txt
+"""
+import io
+import os
+
+import numpy as np
+
+from pvplot.profiling import enabled
+
+# 单个图层的矢量预算: 超过任一项即栅格化
+MAX_VERTICES = 300_000
+MAX_PATHS = 50_000
+
+# 矢量格式 (位图格式无需判断)
+VECTOR_FORMATS = {"pdf", "svg", "eps", "ps"}
+
+# 大小报告最多测量的图层数 (按顶点数从大到小)
+REPORT_LAYERS = 12
+
+
+def artist_complexity(artist):
+    """(路径数, 顶点数); 图像与文字为 (0, 0)"""
+    from matplotlib.collections import Collection
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+
+    if isinstance(artist, Collection):
+        paths = artist.get_paths()
+        vertices = np.array([len(p.vertices) for p in paths]) if paths else np.zeros(0)
+        offsets = artist.get_offsets()
+        n_offsets = len(offsets) if offsets is not None and np.ndim(offsets) == 2 else 0
+        if n_offsets > len(paths):
+            # 散点: 同一标记路径在每个偏移处重复绘制
+            return n_offsets, int(n_offsets * (vertices.mean() if len(vertices) else 0))
+        return len(paths), int(vertices.sum())
+    if isinstance(artist, Line2D):
+        return 1, len(artist.get_xydata())
+    if isinstance(artist, Patch):
+        return 1, len(artist.get_path().vertices)
+    return 0, 0
+
+
+def _data_artists(ax):
+    """坐标轴中的数据图层 (不含背景、坐标轴线、文字与图例)"""
+    from matplotlib.collections import Collection
+    from matplotlib.image import AxesImage
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+
+    return [a for a in ax.get_children()
+            if isinstance(a, (Collection, Line2D, Patch, AxesImage)) and a is not ax.patch
+            and a not in ax.spines.values() and a.get_visible()]
+
+
+def _layer_name(fig, ax, artist):
+    label = artist.get_label()
+    name = f"ax{fig.axes.index(ax)}:{type(artist).__name__}"
+    return f"{name} {label}" if label and not label.startswith("_") else name
+
+
+def layer_report(fig):
+    """
+    各数据图层的复杂度: [{layer, artists, paths, vertices, rasterized}]
+    同一坐标轴内同类型、同标签的 artist (如柱状图的各个矩形) 合并为一个图层
+    """
+    rows = {}
+    for ax in fig.axes:
+        for artist in _data_artists(ax):
+            name = _layer_name(fig, ax, artist)
+            row = rows.setdefault(name, {"layer": name, "artists": [], "paths": 0, "vertices": 0,
+                                         "rasterized": False})
+            paths, vertices = artist_complexity(artist)
+            row["artists"].append(artist)
+            row["paths"] += paths
+            row["vertices"] += vertices
+            row["rasterized"] = row["rasterized"] or bool(artist.get_rasterized())
+    return list(rows.values())
+
+
+def auto_rasterize(fig, max_vertices=MAX_VERTICES, max_paths=MAX_PATHS):
+    """把超过预算的 artist 设为 rasterized (逐个判断), 返回按图层汇总的复杂度记录"""
+    auto = set()
+    for ax in fig.axes:
+        for artist in _data_artists(ax):
+            paths, vertices = artist_complexity(artist)
+            if not artist.get_rasterized() and (vertices > max_vertices or paths > max_paths):
+                artist.set_rasterized(True)
+                auto.add(artist)
+                print(f"自动栅格化: {_layer_name(fig, ax, artist)} ({paths} 路径, {vertices} 顶点)")
+    rows = layer_report(fig)
+    for row in rows:
+        if auto.intersection(row["artists"]):
+            row["rasterized"] = "auto"
+    return rows
+
+
+def _saved_size(fig, fmt, kwargs):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, **kwargs)
+    return buf.tell()
+
+
+def measure_layers(fig, rows, fmt, kwargs, limit=REPORT_LAYERS):
+    """逐个隐藏图层重新保存, 文件大小之差即该图层的大小 (字节), 写回 rows[...]['bytes']"""
+    total = _saved_size(fig, fmt, kwargs)
+    largest = sorted(rows, key=lambda r: (r["vertices"], len(r["artists"])), reverse=True)[:limit]
+    for row in largest:
+        for artist in row["artists"]:
+            artist.set_visible(False)
+        try:
+            row["bytes"] = total - _saved_size(fig, fmt, kwargs)
+        finally:
+            for artist in row["artists"]:
+                artist.set_visible(True)
+    return total
+
+
+def format_report(rows, total):
+    lines = [f"{'layer':<40} {'artists':>7} {'paths':>9} {'vertices':>11} {'raster':>7} {'KB':>9}"]
+    for row in rows:
+        size = f"{row['bytes'] / 1024:9.1f}" if "bytes" in row else f"{'-':>9}"
+        raster = {True: "yes", "auto": "auto", False: "no"}[row["rasterized"]]
+        lines.append(f"{row['layer'][:40]:<40} {len(row['artists']):>7} {row['paths']:>9} "
+                     f"{row['vertices']:>11} {raster:>7} {size}")
+    lines.append(f"{'total':<40} {'':>7} {'':>9} {'':>11} {'':>7} {total / 1024:9.1f}")
+    return "\n".join(lines)
+
+
+def save_figure(fig, path, dpi=300, max_vertices=MAX_VERTICES, max_paths=MAX_PATHS, report=None, **kwargs):
+    """
+    fig.savefig 的替代: 矢量格式先按预算自动栅格化 (位图以 dpi 嵌入), 再保存
+    report=None 时按 PVPLOT_PROFILE 是否含 size 决定是否写出逐图层大小报告
+    """
+    fmt = kwargs.pop("format", None) or os.path.splitext(path)[1][1:].lower() or "png"
+    kwargs["dpi"] = dpi
+    rows = auto_rasterize(fig, max_vertices, max_paths) if fmt in VECTOR_FORMATS else layer_report(fig)
+    if report is None:
+        report = enabled("size")
+    if report:
+        total = measure_layers(fig, rows, fmt, kwargs)
+        text = format_report(rows, total)
+        with open(path + ".layers.txt", "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(text)
+    fig.savefig(path, format=fmt, **kwargs)
+    return path
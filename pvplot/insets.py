@@ -0,0 +1,103 @@
+"""
+区域柱状图插图: 一次 groupby 取各区域前 N 个国家, 所有区域的 (堆叠) 柱子几何一次算成数组,
+每个插图只画一个 PolyCollection
+
+    top = top_n(chart_df, "Value_total", n=5, regions=chart_positions)
+    bars = stacked_bars(top, ["Value_util", "Value_dist"], [color_util, color_dist])
+    draw_inset_bars(ax_sub, bars["Asia"])
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class InsetBars(NamedTuple):
+    """一个区域的柱子: names 为国家名 (自左向右), verts 为 (柱数 × 堆叠层数, 4, 2) 的矩形顶点"""
+    names: list
+    verts: np.ndarray
+    colors: list
+    height: float
+
+
+def top_n(df, value, n=5, regions=None, region="Region"):
+    """各区域 value 最大的前 n 行 (同值保持原顺序), 按区域、数值降序排列"""
+    df = df.reset_index(drop=True)
+    if regions is not None:
+        df = df[df[region].isin(list(regions))]
+    rows = df.groupby(region, sort=False)[value].nlargest(n).index.get_level_values(-1)
+    return df.loc[rows]
+
+
+def stacked_bars(top, stacks, colors, width=0.7, region="Region", name="Nation"):
+    """
+    top_n 的结果 -> {区域: InsetBars}; stacks 为自下而上堆叠的数值列, colors 与之对应
+    各区域内的柱位置为 0, 1, 2, ...
+    """
+    values = top[list(stacks)].to_numpy(float)
+    upper = np.cumsum(values, axis=1)
+    lower = upper - values
+    rank = top.groupby(region, sort=False).cumcount().to_numpy()
+    x0 = np.repeat(rank - width / 2, len(stacks))
+    x1 = x0 + width
+    y0, y1 = lower.ravel(), upper.ravel()
+    # 每个矩形: 左下 -> 左上 -> 右上 -> 右下
+    verts = np.stack([np.column_stack([x0, y0]), np.column_stack([x0, y1]),
+                      np.column_stack([x1, y1]), np.column_stack([x1, y0])], axis=1)
+    facecolors = np.tile(np.asarray(colors, dtype=object), len(top))
+
+    out = {}
+    regions = top[region].to_numpy()
+    names = top[name].to_numpy()
+    per_row = len(stacks)
+    for key in dict.fromkeys(regions):
+        rows = np.flatnonzero(regions == key)
+        rects = (rows[:, None] * per_row + np.arange(per_row)).ravel()
+        out[key] = InsetBars(list(names[rows]), verts[rects], list(facecolors[rects]),
+                             float(np.nanmax(upper[rows, -1])))
+    return out
+
+
+def label_paths(names, size, rotation=90):
+    """
+    国家名 -> 文字轮廓 (单位为 pt, 已旋转), 每个路径的外框水平居中、底边在原点
+    (与 ax.text(ha='center', va='bottom', rotation=rotation) 的对齐方式相同)
+    """
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.textpath import TextPath, text_to_path
+    from matplotlib.transforms import Affine2D
+
+    prop = FontProperties(size=size)
+    rotate = Affine2D().rotate_deg(rotation)
+    paths = []
+    for name in names:
+        name = str(name)
+        # 按排版框 (含前进宽度与上下行高) 而非字形外框对齐, 与 Text 一致
+        w, h, d = text_to_path.get_text_width_height_descent(name, prop, ismath=False)
+        box = rotate.transform([(0, -d), (w, -d), (w, h - d), (0, h - d)])
+        (x0, y0), x1 = box.min(axis=0), box[:, 0].max()
+        path = rotate.transform_path(TextPath((0, 0), name, prop=prop))
+        paths.append(Affine2D().translate(-(x0 + x1) / 2, -y0).transform_path(path))
+    return paths
+
+
+def draw_inset_bars(ax, bars, label_y=0.05, label_size=5.5, headroom=1.25):
+    """
+    一个 PolyCollection 画出全部柱子, 一个 PathCollection 画出全部国家名 (竖排在柱底上方,
+    label_y 为相对最高柱的比例); 坐标范围与原 ax.bar 版本一致
+    """
+    from matplotlib.collections import PathCollection, PolyCollection
+    from matplotlib.transforms import Affine2D
+
+    ax.add_collection(PolyCollection(bars.verts, facecolors=bars.colors, edgecolors="none", linewidths=0))
+    ax.set_xlim(-0.6, len(bars.names) - 0.4)
+    ax.set_ylim(0, bars.height * headroom)
+    if bars.names:
+        # 文字轮廓以 pt 为单位 (随保存时的 dpi 缩放), 位置为柱子的数据坐标
+        ax.add_collection(PathCollection(
+            label_paths(bars.names, label_size),
+            offsets=[(i, bars.height * label_y) for i in range(len(bars.names))],
+            offset_transform=ax.transData,
+            transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+            facecolors="black", edgecolors="none", linewidths=0, zorder=5, clip_on=False,
+        ), autolim=False)
+    return ax
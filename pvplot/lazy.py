@@ -0,0 +1,28 @@
+"""
+延迟导入: 模块对象立即返回, 首次访问属性时才真正执行导入
+
+    gpd = lazy_import("geopandas")
+
+geopandas / pandas / matplotlib.pyplot / scipy 等导入合计 1~2 秒, 而 main.py list、
+增量构建检查 (只读取图脚本中的参数) 等轻量命令用不到它们
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """返回 name 对应的模块; 尚未导入时注册为延迟模块 (子模块会先导入其上级包)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
@@ -0,0 +1,164 @@
+"""
+多分辨率光伏网格: 已有的 1km / 5km / 10km 文件 + 由最细一级块聚合得到的更粗级别
+
+块聚合在投影坐标下按 km 边长的方格对网格单元分组 (向量化 bincount):
+jizhong_ar / fenbu_area / total_area 求和, 光照强按单元面积加权平均, 质心取面积加权平均。
+点图层 (pvplot.data.load_points, 无多边形) 同样可以聚合, 面积取 cell_area 列, 结果仍为点图层。
+select_level 按成图宽度 (mm) 与 DPI 选出仍能分辨的最粗级别, 全幅全球图不再为看不见的细节付出代价,
+区域插图仍可使用细网格。
+"""
+import os
+
+import numpy as np
+import shapely
+
+from pvplot.cache import cache_path, make_key
+from pvplot.data import (AREA_FIELD, SOLAR_BBOX, SOLAR_SHP, TARGET_CRS, load_points, load_solar, scaled_copy,
+                         write_parquet)
+from pvplot.lazy import lazy_import
+from pvplot.profiling import stage
+
+gpd = lazy_import("geopandas")
+pd = lazy_import("pandas")
+
+# 边长 (km) -> 源文件; 不存在的文件自动忽略
+SOLAR_LEVELS = {
+    1: "data/1km/Solar_1km.shp",
+    5: "data/5km/Solar_5km.shp",
+    10: SOLAR_SHP,
+}
+
+# 由最细的已有级别聚合得到的级别 (km)
+DERIVED_LEVELS = [20, 50, 100]
+
+# 求和的字段与面积加权平均的字段
+SUM_FIELDS = ["jizhong_ar", "fenbu_area", "total_area"]
+MEAN_FIELDS = ["光照强"]
+
+LEVELS_VERSION = 1
+
+_LOADED = {}
+
+
+def native_levels(sources=None):
+    """实际存在的源文件 {km: 路径}"""
+    sources = SOLAR_LEVELS if sources is None else sources
+    return {km: path for km, path in sorted(sources.items()) if os.path.exists(path)}
+
+
+def available_levels(sources=None):
+    """可用级别 (km, 升序): 已有文件 + 比最细一级更粗的聚合级别"""
+    native = native_levels(sources)
+    if not native:
+        return []
+    finest = min(native)
+    return sorted(set(native) | {km for km in DERIVED_LEVELS if km > finest})
+
+
+def select_level(width_mm, dpi, extent_width=None, sources=None):
+    """
+    仍能在 width_mm @ dpi 下分辨的最粗级别: 网格边长不超过一个输出像素
+    extent_width 为地图范围宽度 (投影坐标, m), 默认取全球 Robinson 宽度
+    """
+    levels = available_levels(sources)
+    if not levels:
+        raise FileNotFoundError(f"未找到任何光伏网格: {list((sources or SOLAR_LEVELS).values())}")
+    if extent_width is None:
+        from pvplot.stream import projected_extent
+        xmin, xmax, _, _ = projected_extent(SOLAR_BBOX, TARGET_CRS)
+        extent_width = xmax - xmin
+    pixel_km = extent_width / 1000 / (width_mm / 25.4 * dpi)
+    fitting = [km for km in levels if km <= pixel_km]
+    return fitting[-1] if fitting else levels[0]
+
+
+def level_inputs(km, sources=None):
+    """某一级别依赖的源文件 (聚合级别依赖最细的已有文件)"""
+    native = native_levels(sources)
+    return [native[km]] if km in native else [native[min(native)]]
+
+
+def block_aggregate(gdf, km):
+    """
+    把投影后的网格 (含 cx / cy, 原始单位) 聚合到 km 边长的方格
+    返回同样字段的 GeoDataFrame, 几何为方格; 输入为点图层 (有 cell_area 列) 时返回点图层
+    """
+    size = km * 1000.0
+    bx = np.floor(gdf["cx"].values / size).astype(np.int64)
+    by = np.floor(gdf["cy"].values / size).astype(np.int64)
+    codes, blocks = np.unique(np.column_stack([bx, by]), axis=0, return_inverse=True)
+    blocks = blocks.ravel()
+    n = len(codes)
+    points = AREA_FIELD in gdf.columns
+    area = gdf[AREA_FIELD].values if points else shapely.area(gdf.geometry.values)
+    area_sum = np.bincount(blocks, weights=area, minlength=n)
+
+    data = {}
+    for col in SUM_FIELDS:
+        if col in gdf.columns:
+            v = gdf[col].values.astype(float)
+            ok = ~np.isnan(v)
+            total = np.bincount(blocks[ok], weights=v[ok], minlength=n)
+            # 整块都是 NaN 时保持 NaN
+            has = np.bincount(blocks[ok], minlength=n) > 0
+            data[col] = np.where(has, total, np.nan)
+    for col in MEAN_FIELDS:
+        if col in gdf.columns:
+            v = gdf[col].values.astype(float)
+            ok = ~np.isnan(v)
+            weight = np.bincount(blocks[ok], weights=area[ok], minlength=n)
+            total = np.bincount(blocks[ok], weights=v[ok] * area[ok], minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                data[col] = np.where(weight > 0, total / weight, np.nan)
+    # 面积加权质心; 只含零面积碎片 (裁剪边界上) 的块退化为算术平均
+    count = np.bincount(blocks, minlength=n)
+    for col in ("cx", "cy"):
+        v = gdf[col].values
+        weighted = np.bincount(blocks, weights=v * area, minlength=n)
+        plain = np.bincount(blocks, weights=v, minlength=n) / count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            data[col] = np.where(area_sum > 0, weighted / area_sum, plain)
+
+    if points:
+        data[AREA_FIELD] = area_sum
+        return pd.DataFrame(data)
+    geometry = shapely.box(codes[:, 0] * size, codes[:, 1] * size,
+                           (codes[:, 0] + 1) * size, (codes[:, 1] + 1) * size)
+    return gpd.GeoDataFrame(data, geometry=geometry, crs=gdf.crs)
+
+
+def load_level(km, bbox=SOLAR_BBOX, target_crs=TARGET_CRS, scaled=False, sources=None, points=False):
+    """
+    读取某一级别的投影网格 (与 load_solar 相同的字段与 attrs); 聚合级别按
+    (最细级别图层, km) 缓存为 GeoParquet; points=True 时为不含多边形的点图层 (见 load_points)
+    """
+    loader = load_points if points else load_solar
+    native = native_levels(sources)
+    if km in native:
+        return loader(bbox, target_crs, shp_path=native[km], scaled=scaled)
+    if km not in available_levels(sources):
+        raise ValueError(f"不可用的网格级别: {km} km, 可选 {available_levels(sources)}")
+
+    base = loader(bbox, target_crs, shp_path=native[min(native)])
+    key = make_key("block", base.attrs["layer_key"], km, LEVELS_VERSION)
+    if key not in _LOADED:
+        path = cache_path("layers", f"{'points' if points else 'solar'}_{km}km_{key}.parquet")
+        with stage(f"load_level_{km}km"):
+            if os.path.exists(path):
+                gdf = pd.read_parquet(path) if points else gpd.read_parquet(path)
+            else:
+                print(f"构建缓存: {km}km 聚合网格 -> {path}")
+                gdf = block_aggregate(base, km)
+                write_parquet(gdf, path)
+        gdf.attrs["cache_key"] = key
+        gdf.attrs["layer_key"] = key
+        _LOADED[key] = gdf
+    gdf = _LOADED[key]
+    return scaled_copy(gdf) if scaled else gdf
+
+
+def load_for_figure(width_mm, dpi, bbox=SOLAR_BBOX, target_crs=TARGET_CRS, scaled=False, level="auto",
+                    sources=None, points=False):
+    """level="auto" 时按成图宽度与 DPI 选择级别, 否则使用给定的 km"""
+    km = select_level(width_mm, dpi, sources=sources) if level == "auto" else level
+    return load_level(km, bbox, target_crs, scaled=scaled, sources=sources, points=points)
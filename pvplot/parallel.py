@@ -0,0 +1,81 @@
+"""
+进程池批量渲染
+
+父进程先把数据加载好放进 shared, 再以 fork 方式启动进程池:
+子进程直接继承父进程内存 (写时复制), 不再逐个任务 pickle GeoDataFrame。
+大块数值数组 (质心、字段列、光照栅格) 可先用 pvplot.shared 发布为内存映射, shared 中只放句柄。
+注意 Python 3.14 起 Linux 默认启动方式改为 forkserver, 这里显式指定 fork;
+不支持 fork 的平台 (Windows) 退化为当前进程内顺序执行。
+"""
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# fork 之前由父进程填充, 子进程只读
+_SHARED = {}
+
+
+def shared():
+    """当前进程可见的共享数据 (子进程中即父进程 fork 时的快照)"""
+    return _SHARED
+
+
+def _init_worker():
+    # 子进程只做离屏渲染
+    import matplotlib.pyplot as plt
+    plt.switch_backend("Agg")
+
+
+def _timed(func, job):
+    start = time.perf_counter()
+    result = func(_SHARED, job)
+    return job, result, time.perf_counter() - start, os.getpid()
+
+
+def _fork_context():
+    if "fork" in mp.get_all_start_methods():
+        return mp.get_context("fork")
+    return None
+
+
+def run_jobs(func, jobs, shared_data=None, workers=None, label=str):
+    """
+    并行执行 func(shared, job), 返回按提交顺序排列的结果并打印耗时报告
+    func 必须是模块级函数 (可 pickle); job 为轻量参数 (如 (PVtype, 格式))
+    workers=1 或无法 fork 时在当前进程顺序执行
+    """
+    jobs = list(jobs)
+    _SHARED.clear()
+    _SHARED.update(shared_data or {})
+
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    ctx = _fork_context()
+
+    wall_start = time.perf_counter()
+    records = {}
+    if workers <= 1 or ctx is None or len(jobs) <= 1:
+        for i, job in enumerate(jobs):
+            records[i] = _timed(func, job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_init_worker) as pool:
+            futures = {pool.submit(_timed, func, job): i for i, job in enumerate(jobs)}
+            for fut in as_completed(futures):
+                records[futures[fut]] = fut.result()
+    wall = time.perf_counter() - wall_start
+
+    ordered = [records[i] for i in range(len(jobs))]
+    print_timing_report(ordered, wall, label)
+    return [r[1] for r in ordered]
+
+
+def print_timing_report(records, wall, label=str):
+    """打印每个任务的耗时, 以及总墙钟时间与串行耗时之和"""
+    width = max([len(label(job)) for job, *_ in records] + [4])
+    print(f"{'job':<{width}}  {'pid':>7}  {'time(s)':>8}  output")
+    for job, result, seconds, pid in records:
+        print(f"{label(job):<{width}}  {pid:>7}  {seconds:>8.2f}  {result}")
+    total = sum(r[2] for r in records)
+    print(f"共 {len(records)} 个任务, 墙钟 {wall:.2f}s, 累计 {total:.2f}s")
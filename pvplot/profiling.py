@@ -0,0 +1,216 @@
+"""
+分阶段计时与峰值内存记录
+
+    with stage("savefig"):
+        fig.savefig(...)
+
+    @timed("classify")          # 函数级阶段
+    @pipeline("fig2")           # 整个图的流程, 返回值为输出路径
+
+阶段可以嵌套, 记录名为 "外层/内层"; 每条记录含墙钟时间与该阶段内的峰值 RSS。
+Linux 上通过 /proc/self/clear_refs 在阶段开始时重置峰值 (VmHWM), 得到阶段自身的峰值;
+其他平台退化为进程启动以来的峰值 (ru_maxrss)。
+只有设置了 PVPLOT_PROFILE 或调用过 collect() (基准测试) 时才记录, 否则 stage 不做任何事;
+常驻进程 (main.py serve) 每轮重绘前调用 reset(), 记录不会无限增长。
+
+环境变量 PVPLOT_PROFILE (或 main.py --profile) 打开额外输出, 逗号分隔:
+    trace        在输出图旁写 <输出>.trace.json (Chrome / Perfetto 时间线)
+    cprofile     写 <输出>.prof 并打印累计耗时最多的函数
+    tracemalloc  写 <输出>.tracemalloc.txt (Python 分配峰值与分配最多的代码行)
+    size         写 <输出>.layers.txt (各图层的路径数 / 顶点数 / 是否栅格化 / 文件大小, 见 pvplot.export)
+    1 / all      以上全部
+"""
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = "PVPLOT_PROFILE"
+PROFILE_KINDS = ["trace", "cprofile", "tracemalloc", "size"]
+
+# 已完成的阶段记录 (按完成顺序)
+_RECORDS = []
+# collect() 打开的记录开关 (不依赖 PVPLOT_PROFILE)
+_COLLECT = []
+# 正在进行的阶段: [名称, 子阶段内的最大峰值]
+_STACK = []
+
+_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _can_reset_peak():
+    try:
+        with open(_CLEAR_REFS, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+_RESET_PEAK = sys.platform.startswith("linux") and _can_reset_peak()
+
+
+def peak_rss_mb():
+    """当前进程的峰值 RSS (MB)"""
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节, Linux 为 KB
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _reset_peak():
+    if _RESET_PEAK:
+        with open(_CLEAR_REFS, "w") as f:
+            f.write("5")
+
+
+def collect(on=True):
+    """不设置 PVPLOT_PROFILE 也记录阶段 (基准测试只需要 records(), 不需要其他报告)"""
+    _COLLECT[:] = [True] if on else []
+
+
+def recording():
+    return bool(_COLLECT) or any(enabled(kind) for kind in PROFILE_KINDS)
+
+
+@contextmanager
+def stage(name):
+    """记录一个阶段的墙钟时间与峰值 RSS (未开启记录时直接执行)"""
+    if not recording():
+        yield
+        return
+    if _STACK:
+        # 父阶段到目前为止的峰值, 在重置前先并入父阶段
+        _STACK[-1][1] = max(_STACK[-1][1], peak_rss_mb())
+    _reset_peak()
+    path = "/".join([s[0] for s in _STACK] + [name])
+    _STACK.append([name, 0.0])
+    start = time.perf_counter()
+    ts = time.time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        _, child_peak = _STACK.pop()
+        peak = max(peak_rss_mb(), child_peak)
+        _RECORDS.append({"stage": path, "wall_s": round(wall, 4), "peak_rss_mb": round(peak, 1),
+                         "pid": os.getpid(), "start": ts})
+        if _STACK:
+            _STACK[-1][1] = max(_STACK[-1][1], peak)
+
+
+def timed(name=None):
+    """装饰器形式的 stage, 默认以函数名为阶段名"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def records():
+    return list(_RECORDS)
+
+
+def reset():
+    _RECORDS.clear()
+
+
+def enabled(kind):
+    """PVPLOT_PROFILE 是否打开了 kind (trace / cprofile / tracemalloc)"""
+    value = os.environ.get(PROFILE_ENV, "").lower()
+    kinds = {k.strip() for k in value.split(",") if k.strip()}
+    return kind in kinds or bool(kinds & {"1", "all", "true"})
+
+
+def chrome_trace(stage_records):
+    """阶段记录 -> Chrome trace 事件 (ph="X" 完整事件, 时间单位 μs)"""
+    events = []
+    for r in stage_records:
+        events.append({
+            "name": r["stage"].rsplit("/", 1)[-1], "cat": "stage", "ph": "X",
+            "ts": round(r["start"] * 1e6), "dur": round(r["wall_s"] * 1e6),
+            "pid": r["pid"], "tid": r["pid"],
+            "args": {"stage": r["stage"], "peak_rss_mb": r["peak_rss_mb"]},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(path, stage_records=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(_RECORDS if stage_records is None else stage_records), f, ensure_ascii=False)
+    return path
+
+
+# 当前进程内是否已有 pipeline 会话 (嵌套调用时只记阶段, 不重复开启分析器)
+_SESSION = []
+
+
+def _write_reports(output, stage_records, profiler, malloc_snapshot, malloc_peak):
+    if enabled("trace"):
+        print(f"时间线: {write_trace(output + '.trace.json', stage_records)}")
+    if profiler is not None:
+        import pstats
+        profiler.dump_stats(output + ".prof")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        print(f"cProfile: {output}.prof")
+    if malloc_snapshot is not None:
+        lines = [f"peak traced: {malloc_peak / 1024 / 1024:.1f} MB", ""]
+        lines += [str(s) for s in malloc_snapshot.statistics("lineno")[:25]]
+        with open(output + ".tracemalloc.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"tracemalloc: {output}.tracemalloc.txt")
+
+
+def pipeline(name):
+    """
+    装饰整个图的绘制函数: 记录为顶层阶段, 并按 PVPLOT_PROFILE 在输出图旁写出
+    时间线 / cProfile / tracemalloc 报告; 被装饰函数返回输出路径 (或路径列表)
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _SESSION:
+                with stage(name):
+                    return func(*args, **kwargs)
+
+            profiler = None
+            if enabled("cprofile"):
+                import cProfile
+                profiler = cProfile.Profile()
+            tracing = enabled("tracemalloc")
+            if tracing:
+                import tracemalloc
+                tracemalloc.start()
+            first = len(_RECORDS)
+            _SESSION.append(name)
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                with stage(name):
+                    result = func(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                _SESSION.pop()
+                snapshot = peak = None
+                if tracing:
+                    snapshot = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+            outputs = [result] if isinstance(result, str) else list(result or [])
+            if outputs:
+                _write_reports(outputs[0], _RECORDS[first:], profiler, snapshot, peak)
+            return result
+        return wrapper
+    return decorate
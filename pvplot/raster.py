@@ -0,0 +1,106 @@
+"""
+把 10km 网格多边形烧录成 Robinson 坐标下的二维栅格, 用一次 imshow 代替逐多边形绘制
+
+烧录的是每个像元所在网格单元的行号 (-1 表示无数据), 因此同一份栅格可映射任意字段;
+行号栅格按 (图层, 范围, 分辨率) 缓存到磁盘, 重绘时跳过烧录
+"""
+import os
+
+import numpy as np
+import shapely
+
+from pvplot.cache import cache_path, make_key, save_array
+
+# 进程内缓存
+_RASTERS = {}
+
+# 每次查询的像元行数 (控制临时 Point 数组的内存)
+CHUNK_ROWS = 128
+
+
+def figure_pixels(width_mm, dpi):
+    """图宽 (mm) 在给定 DPI 下的像素数"""
+    return int(round(width_mm / 25.4 * dpi))
+
+
+def pixel_grid(extent, width_px):
+    """
+    extent = (xmin, xmax, ymin, ymax); 方形像元, 高度按范围比例推算
+    返回像元中心坐标 xs, ys (ys 自下而上, 配合 imshow origin='lower')
+    """
+    xmin, xmax, ymin, ymax = extent
+    size = (xmax - xmin) / width_px
+    ny = max(1, int(np.ceil((ymax - ymin) / size)))
+    xs = xmin + (np.arange(width_px) + 0.5) * size
+    ys = ymin + (np.arange(ny) + 0.5) * size
+    return xs, ys
+
+
+def burn_index(geoms, extent, width_px):
+    """
+    每个像元中心落入的几何对象序号 (STRtree 批量点查询), 无覆盖为 -1
+    """
+    xs, ys = pixel_grid(extent, width_px)
+    tree = shapely.STRtree(np.asarray(geoms))
+    out = np.full((len(ys), len(xs)), -1, dtype=np.int32)
+    for r0 in range(0, len(ys), CHUNK_ROWS):
+        xx, yy = np.meshgrid(xs, ys[r0:r0 + CHUNK_ROWS])
+        points = shapely.points(xx.ravel(), yy.ravel())
+        pix, geom_idx = tree.query(points, predicate="intersects")
+        block = out[r0:r0 + CHUNK_ROWS].reshape(-1)
+        block[pix] = geom_idx
+    return out
+
+
+def layer_extent(gdf):
+    minx, miny, maxx, maxy = gdf.total_bounds
+    return (float(minx), float(maxx), float(miny), float(maxy))
+
+
+def cached_index(gdf, width_px, extent=None):
+    """
+    带磁盘缓存的 burn_index, 返回 (index, extent)
+    gdf 需带 pvplot.data 写入的 attrs['layer_key'], 否则不缓存
+    """
+    if extent is None:
+        extent = layer_extent(gdf)
+    data_key = gdf.attrs.get("layer_key")
+    if data_key is None:
+        return burn_index(gdf.geometry.values, extent, width_px), extent
+
+    key = make_key(data_key, [float(v) for v in extent], width_px)
+    if key in _RASTERS:
+        return _RASTERS[key], extent
+    path = cache_path("raster", f"{key}.npy")
+    if os.path.exists(path):
+        index = np.load(path)
+    else:
+        index = burn_index(gdf.geometry.values, extent, width_px)
+        save_array(path, index)
+    _RASTERS[key] = index
+    return index, extent
+
+
+def take(index, values):
+    """按行号栅格取出字段值, 无数据像元为 NaN"""
+    out = np.asarray(values, float)[np.where(index >= 0, index, 0)]
+    out[index < 0] = np.nan
+    return out
+
+
+def draw_classes(ax, classes, extent, cmap, zorder=None, **kwargs):
+    """以一次 imshow 绘制分级栅格 (见 pvplot.classify), 第 i 级对应 cmap 的第 i 个颜色, -1 为透明"""
+    from matplotlib.colors import BoundaryNorm
+
+    n = cmap.N
+    norm = BoundaryNorm(np.arange(-0.5, n + 0.5), n)
+    return ax.imshow(
+        np.ma.masked_less(classes, 0),
+        cmap=cmap,
+        norm=norm,
+        extent=extent,
+        origin="lower",
+        interpolation="nearest",
+        zorder=zorder,
+        **kwargs,
+    )
@@ -0,0 +1,155 @@
+"""
+区域图 (国家 / 经纬度范围) : 从已投影的全局图层中取出区域内的网格, 再投影到区域中心的
+Lambert 等积方位投影 (LAEA), 不再为每个区域重跑全局流程后裁切
+
+    world, solar = drawmap.load_layers()
+    region = country_region(world, "Germany")
+    world_local, solar_local = region_layers(world, solar, region)
+
+区域内的网格由缓存的国家归属 (pvplot.country) 或 STRtree 查询得到, 只对这部分网格重投影;
+局部图层带 layer_key, 栅格行号可照常经 raster.cached_index 缓存
+"""
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+
+from pvplot.cache import make_key
+from pvplot.country import country_cells, name_field
+from pvplot.data import TARGET_CRS, project_points
+
+# 区域外留白 (占区域宽 / 高的比例)
+MARGIN = 0.05
+
+# 投影经纬度范围时每条边的加密点数
+DENSIFY = 64
+
+# 进程内缓存: 图层 layer_key -> STRtree; (图层, 区域) -> 局部图层
+_TREES = {}
+_LOCAL = {}
+
+
+class Region(NamedTuple):
+    """
+    区域: geometry 为全局图层投影 (source_crs) 下的范围, crs 为区域局部投影,
+    country 表示按国家归属取网格
+    """
+    name: str
+    geometry: object
+    crs: str
+    source_crs: str = TARGET_CRS
+    country: bool = False
+
+    @property
+    def key(self):
+        return make_key("region", self.name, self.crs, shapely.to_wkb(self.geometry).hex())
+
+
+def local_crs(lon, lat):
+    """以 (lon, lat) 为中心的 Lambert 等积方位投影"""
+    return f"+proj=laea +lat_0={lat:.4f} +lon_0={lon:.4f} +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
+
+
+def _center_lonlat(geom, crs):
+    from pyproj import Transformer
+
+    point = shapely.centroid(geom)
+    lon, lat = Transformer.from_crs(crs, "EPSG:4326", always_xy=True).transform(point.x, point.y)
+    return float(lon), float(lat)
+
+
+def country_region(world, country, field=None):
+    """world (已投影) 中名为 country 的国家 (多个要素合并)"""
+    field = field or name_field(world)
+    rows = world[world[field] == country]
+    if rows.empty:
+        raise ValueError(f"国家未找到: {country}")
+    geom = shapely.union_all(rows.geometry.values)
+    return Region(country, geom, local_crs(*_center_lonlat(geom, world.crs)), str(world.crs), country=True)
+
+
+def bbox_region(bbox, name=None, crs=TARGET_CRS):
+    """经纬度范围 (minx, miny, maxx, maxy), 沿边加密后投影到全局图层的 crs"""
+    from pyproj import Transformer
+
+    minx, miny, maxx, maxy = bbox
+    ring = shapely.segmentize(shapely.box(minx, miny, maxx, maxy),
+                              max(maxx - minx, maxy - miny) / DENSIFY)
+    t = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+    geom = shapely.transform(ring, lambda c: np.column_stack(t.transform(c[:, 0], c[:, 1])))
+    name = name or "bbox_" + "_".join(f"{v:g}" for v in bbox)
+    return Region(name, geom, local_crs((minx + maxx) / 2, (miny + maxy) / 2), crs)
+
+
+def solar_tree(solar):
+    """网格多边形的 STRtree, 同一图层在进程内只建一次"""
+    key = solar.attrs.get("layer_key")
+    if key is None:
+        return shapely.STRtree(solar.geometry.values)
+    if key not in _TREES:
+        _TREES[key] = shapely.STRtree(solar.geometry.values)
+    return _TREES[key]
+
+
+def region_cells(solar, region, world=None):
+    """区域内的网格行号: 国家区域按质心归属 (需给出 world), 其余按与范围相交"""
+    if region.country and world is not None:
+        return country_cells(solar, world, region.name)
+    return np.sort(solar_tree(solar).query(region.geometry, predicate="intersects"))
+
+
+def prepare(solar, world=None, regions=()):
+    """在批量渲染 (fork) 之前建好 STRtree / 国家归属, 子进程直接继承"""
+    if any(not r.country for r in regions):
+        solar_tree(solar)
+    if world is not None and any(r.country for r in regions):
+        from pvplot.country import assign_countries
+        assign_countries(solar, world)
+
+
+def region_layers(world, solar, region):
+    """
+    投影到区域局部投影的 (底图, 网格); 底图取与区域外包范围相交的国家, 网格取 region_cells,
+    网格质心 cx / cy 由原质心点投影到局部投影
+    """
+    cache_key = make_key(solar.attrs.get("cache_key"), world.attrs.get("cache_key"), region.key)
+    if cache_key in _LOCAL:
+        return _LOCAL[cache_key]
+
+    cells = region_cells(solar, region, world)
+    local = solar.iloc[cells].to_crs(region.crs)
+    # 质心点直接投影 (与 pvplot.data 的点优先口径一致), 不在局部投影下重算多边形质心
+    local["cx"], local["cy"] = project_points(solar["cx"].values[cells], solar["cy"].values[cells],
+                                              region.source_crs, region.crs)
+    local = local.reset_index(drop=True)
+    if solar.attrs.get("layer_key"):
+        local.attrs["layer_key"] = make_key(solar.attrs["layer_key"], region.key)
+        local.attrs["cache_key"] = cache_key
+
+    envelope = shapely.envelope(region.geometry)
+    nearby = world.iloc[world.sindex.query(envelope, predicate="intersects")]
+    world_local = nearby.to_crs(region.crs)
+    # to_crs 沿用全球底图的 attrs, 需换成区域自己的键 (底图路径等缓存按键区分)
+    if world.attrs.get("cache_key"):
+        world_local.attrs["cache_key"] = make_key(world.attrs["cache_key"], region.key, "world")
+        world_local.attrs["layer_key"] = world_local.attrs["cache_key"]
+
+    _LOCAL[cache_key] = (world_local, local)
+    return _LOCAL[cache_key]
+
+
+def region_extent(region, margin=MARGIN):
+    """区域在局部投影下的范围 (xmin, xmax, ymin, ymax), 四周留白 margin"""
+    from pyproj import Transformer
+
+    t = Transformer.from_crs(region.source_crs, region.crs, always_xy=True)
+    geom = shapely.transform(region.geometry, lambda c: np.column_stack(t.transform(c[:, 0], c[:, 1])))
+    minx, miny, maxx, maxy = shapely.bounds(geom)
+    dx, dy = (maxx - minx) * margin, (maxy - miny) * margin
+    return (float(minx - dx), float(maxx + dx), float(miny - dy), float(maxy + dy))
+
+
+def region_width_m(region, margin=MARGIN):
+    """区域 (含留白) 在局部投影下的宽度, 用于按图宽选择网格级别"""
+    xmin, xmax, _, _ = region_extent(region, margin)
+    return xmax - xmin
@@ -0,0 +1,76 @@
+"""
+常驻渲染: 图层与依赖库留在进程内, 监视图脚本与参数覆盖文件, 有变化时只重新执行绘图阶段
+
+    python main.py serve fig1 fig2 --config figures.json
+
+参数覆盖文件为 JSON, 按图名给出要替换的模块级参数, 如
+    {"fig1": {"chart_positions": {"Asia": [0.84, 0.64, 0.12, 0.23]}, "grid_size": 300},
+     "fig2": {"custom_bins": [2500, 3000, 3500, 4000, 4500, 5000, 6000, 7000, 8000]}}
+只对渲染时读取的参数生效 (在模块导入时由其他参数派生的对象, 如 cmap_custom, 需改 figures.toml 或脚本本身;
+figures.toml 同样被监视, 修改后各图脚本重新执行、重新编译样式)。
+图脚本改动后 importlib.reload 重新执行模块 (模块顶层不做 I/O, 依赖库已导入, 代价很小),
+已投影的图层保留在 pvplot.data 等模块的进程内缓存中, 不重新读取。
+"""
+import importlib
+import importlib.util
+import json
+import os
+import sys
+
+
+class Watcher:
+    """按修改时间轮询一组文件 (不依赖额外的文件监视库)"""
+
+    def __init__(self, paths):
+        self.paths = [p for p in paths if p]
+        self.mtimes = {p: self._mtime(p) for p in self.paths}
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def changed(self):
+        """自上次调用以来修改 (或新建 / 删除) 的文件"""
+        out = []
+        for path in self.paths:
+            mtime = self._mtime(path)
+            if mtime != self.mtimes[path]:
+                self.mtimes[path] = mtime
+                out.append(path)
+        return out
+
+
+def load_overrides(path):
+    """{图名: {参数名: 值}}; 文件不存在时为空"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict) or not all(isinstance(v, dict) for v in overrides.values()):
+        raise ValueError(f"参数覆盖文件应为 {{图名: {{参数: 值}}}}: {path}")
+    return overrides
+
+
+def apply_overrides(module, params):
+    """把覆盖值写入模块; 只允许替换已有的参数, 拼错的名字直接报错"""
+    unknown = [name for name in params if not hasattr(module, name)]
+    if unknown:
+        raise AttributeError(f"{module.__name__} 没有参数: {unknown}")
+    for name, value in params.items():
+        setattr(module, name, value)
+
+
+def reload_module(name):
+    """重新执行已导入的图脚本 (未导入时正常导入)"""
+    if name in sys.modules:
+        return importlib.reload(sys.modules[name])
+    return importlib.import_module(name)
+
+
+def module_file(name):
+    """模块源文件路径 (不导入模块)"""
+    spec = importlib.util.find_spec(name)
+    return spec.origin if spec else None
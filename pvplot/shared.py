@@ -0,0 +1,113 @@
+"""
+进程池的数据交接: 父进程把数组发布为内存映射的 .npy (优先放在 /dev/shm), 子进程按句柄只读映射,
+所有进程共用同一份物理内存, 内存占用不随进程数增长
+
+    with published({"cx": cx, "cy": cy, "total_area": v}, attrs={"cache_key": key}) as handle:
+        run_jobs(job, jobs, {"points": handle})     # 传给子进程的只有目录名与列名
+
+    def job(shared, _):
+        points = attach(shared["points"])          # 列名 -> 只读 memmap, 不复制
+        points["cx"], points.columns, points.attrs
+
+fork 写时复制对 numpy 数据区同样有效, 但 GeoDataFrame / 对象数组在子进程中一经访问
+(引用计数) 就会逐页复制; 发布的数组不含 Python 对象, 也不依赖 fork。
+"""
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import NamedTuple
+
+import numpy as np
+
+# 发布目录的候选位置 (按顺序取第一个存在的; /dev/shm 为内存文件系统)
+SHARED_ROOTS = ("/dev/shm",)
+
+
+class SharedArrays(NamedTuple):
+    """已发布数组的句柄 (可 pickle): 目录、数组名与附带的小型元数据"""
+    directory: str
+    names: tuple
+    attrs: dict = {}
+
+
+class ArrayTable(Mapping):
+    """attach 的结果: 列名 -> 只读数组; 与 DataFrame 一样提供 columns / attrs"""
+
+    def __init__(self, arrays, attrs=None):
+        self._arrays = dict(arrays)
+        self.attrs = dict(attrs or {})
+
+    @property
+    def columns(self):
+        return list(self._arrays)
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __iter__(self):
+        return iter(self._arrays)
+
+    def __len__(self):
+        return len(self._arrays)
+
+
+def _shared_root():
+    return next((d for d in SHARED_ROOTS if os.path.isdir(d) and os.access(d, os.W_OK)), None)
+
+
+def publish(arrays, attrs=None):
+    """把 {名称: 数组} 写入新的临时目录, 返回句柄; 用完后由 release 删除"""
+    directory = tempfile.mkdtemp(prefix="pvplot-", dir=_shared_root())
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+    return SharedArrays(directory, tuple(arrays), dict(attrs or {}))
+
+
+def attach(handle):
+    """按句柄只读映射已发布的数组"""
+    arrays = {name: np.load(os.path.join(handle.directory, f"{name}.npy"), mmap_mode="r")
+              for name in handle.names}
+    return ArrayTable(arrays, handle.attrs)
+
+
+def release(handle):
+    shutil.rmtree(handle.directory, ignore_errors=True)
+
+
+@contextmanager
+def published(arrays, attrs=None):
+    """publish + release"""
+    handle = publish(arrays, attrs)
+    try:
+        yield handle
+    finally:
+        release(handle)
+
+
+@contextmanager
+def published_layers(layers):
+    """
+    发布 stream_layers / precompute_layers 形式的图层 (光照栅格 + ThinnedPoints 散点),
+    其余键 (范围、缓存键等) 作为元数据随句柄传递; 子进程用 attach_layers 还原
+    """
+    points = layers["points"]
+    arrays = {"radiation": layers["radiation"], **{f"points.{f}": v for f, v in points._asdict().items()}}
+    attrs = {k: v for k, v in layers.items() if k not in ("radiation", "points")}
+    with published(arrays, attrs) as handle:
+        yield handle
+
+
+def attach_layers(handle):
+    """published_layers 的句柄 -> 图层 dict (数组为只读 memmap)"""
+    from pvplot.stream import ThinnedPoints
+
+    table = attach(handle)
+    points = ThinnedPoints(*(table[f"points.{f}"] for f in ThinnedPoints._fields))
+    return {**table.attrs, "radiation": table["radiation"], "points": points}
+
+
+def table_arrays(df, columns):
+    """DataFrame 中存在的列 -> float 数组 (缺失的列跳过)"""
+    return {col: np.asarray(df[col], float) for col in columns if col in df.columns}
@@ -0,0 +1,68 @@
+"""
+分布曲线的批量平滑
+
+同一光照轴上有效点位置相同的列共用一次样条拟合 (make_interp_spline 的二维 y),
+在共享的 300 点网格上一次求值; 结果按 (x, 列内容, 方法) 的哈希缓存。
+method="pchip" 使用保形的 PchipInterpolator, 非负数据插值后仍非负, 不需要截断。
+"""
+import hashlib
+
+import numpy as np
+
+N_POINTS = 300
+METHODS = ["spline", "pchip"]
+
+_SMOOTHED = {}
+
+
+def _column_key(x, y, method, n):
+    h = hashlib.sha1()
+    for arr in (x, y):
+        h.update(np.ascontiguousarray(arr, dtype=float).tobytes())
+    h.update(f"{method}:{n}".encode())
+    return h.hexdigest()
+
+
+def _fit(x, Y, method):
+    from scipy.interpolate import PchipInterpolator, make_interp_spline
+
+    if method == "spline":
+        return make_interp_spline(x, Y, k=3, axis=0)
+    if method == "pchip":
+        return PchipInterpolator(x, Y, axis=0)
+    raise ValueError(f"未知的平滑方法: {method}, 可选 {METHODS}")
+
+
+def smooth_columns(x, columns, method="spline", n=N_POINTS):
+    """
+    columns: {列名: y 数组 (可含 NaN)}, 与 x 等长
+    返回 {列名: (x_smooth, y_smooth)}; 有效点不超过 3 个的列为 None
+    spline 结果截断为非负 (与原 np.maximum(..., 0) 一致)
+    """
+    x = np.asarray(x, float)
+    result = {}
+    groups = {}
+    for name, y in columns.items():
+        y = np.asarray(y, float)
+        mask = ~np.isnan(y)
+        if mask.sum() <= 3:
+            result[name] = None
+            continue
+        key = _column_key(x, y, method, n)
+        if key in _SMOOTHED:
+            result[name] = _SMOOTHED[key]
+            continue
+        groups.setdefault(mask.tobytes(), (mask, []))[1].append((name, key, y))
+
+    # 有效点位置相同的列: 一次拟合, 一次求值
+    for mask, items in groups.values():
+        xm = x[mask]
+        x_smooth = np.linspace(xm.min(), xm.max(), n)
+        Y = np.column_stack([y[mask] for _, _, y in items])
+        Y_smooth = _fit(xm, Y, method)(x_smooth)
+        if method == "spline":
+            Y_smooth = np.maximum(Y_smooth, 0) # 确保无负值
+        for j, (name, key, _) in enumerate(items):
+            _SMOOTHED[key] = (x_smooth, Y_smooth[:, j])
+            result[name] = _SMOOTHED[key]
+    return result
@@ -0,0 +1,157 @@
+"""
+声明式图件样式: figures.toml -> 编译好的 rcParams / ListedColormap / BoundaryNorm / 尺寸 / 布局
+
+    STYLE = compile_figure("fig2")                 # 模块导入时编译一次
+    with mpl.rc_context(STYLE.rc):
+        fig, ax = plt.subplots(figsize=STYLE.figsize)
+        draw_classes(ax, classify(values, STYLE.bins), extent, STYLE.cmap)
+
+    for name in variant_names("fig2"):             # 变体 (不同分级 / 配色) 共用已加载的数据
+        compile_figure("fig2", name)
+
+编译结果按 (文件, 修改时间, 图名, 变体) 缓存; 文件格式见 figures.toml 开头的说明。
+"""
+import os
+import tomllib
+from typing import NamedTuple
+
+# 样式文件, 可用环境变量 PVPLOT_SPEC 覆盖
+SPEC_ENV = "PVPLOT_SPEC"
+DEFAULT_SPEC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "figures.toml")
+
+MM_TO_INCH = 1 / 25.4
+
+# 分级相关字段 (图 / 变体中给出时覆盖 classes 中的值)
+CLASS_FIELDS = ("bins", "colors", "labels", "cmap")
+# 与上层合并 (而非整体替换) 的字段
+MERGED_FIELDS = ("rc_params", "colors", "layout")
+
+_SPECS = {}
+_STYLES = {}
+
+
+class FigureStyle(NamedTuple):
+    """一张图 (或其变体) 编译后的样式; 无分级的图 bins / colors / cmap / norm 为 None"""
+    name: str
+    variant: str
+    rc: dict
+    width_mm: float
+    aspect: float
+    bins: list = None
+    colors: list = None
+    labels: list = None
+    cmap: object = None
+    norm: object = None
+    named_colors: dict = {}
+    layout: dict = {}
+
+    @property
+    def figsize(self):
+        """(宽, 高) 英寸"""
+        width = self.width_mm * MM_TO_INCH
+        return (width, width * self.aspect)
+
+
+def spec_path(path=None):
+    return path or os.environ.get(SPEC_ENV, DEFAULT_SPEC)
+
+
+def load_spec(path=None):
+    """解析后的样式文件 (按修改时间缓存)"""
+    path = spec_path(path)
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+    if key not in _SPECS:
+        with open(path, "rb") as f:
+            _SPECS[key] = tomllib.load(f)
+    return _SPECS[key]
+
+
+def variant_names(figure, path=None):
+    return list(load_spec(path)["figures"][figure].get("variants", {}))
+
+
+def default_labels(bins):
+    """'<b0', 'b0-b1', ..., '>bn'"""
+    labels = [f"<{bins[0]:g}"]
+    labels += [f"{lo:g}-{hi:g}" for lo, hi in zip(bins[:-1], bins[1:])]
+    return labels + [f">{bins[-1]:g}"]
+
+
+def _sample_cmap(name, n):
+    from matplotlib import colormaps
+    from matplotlib.colors import to_hex
+
+    cmap = colormaps[name].resampled(n)
+    return [to_hex(cmap(i)) for i in range(n)]
+
+
+def _merge(base, override):
+    out = dict(base)
+    for key, value in override.items():
+        if key in MERGED_FIELDS and isinstance(value, dict):
+            out[key] = {**base.get(key, {}), **value}
+        else:
+            out[key] = value
+    return out
+
+
+def _compile_classes(spec, fig, figure):
+    """分级断点、颜色与标签; 图 / 变体给出的字段覆盖所引用的 classes"""
+    base = spec.get("classes", {}).get(fig["classes"], {}) if "classes" in fig else {}
+    own = {key: fig[key] for key in CLASS_FIELDS if key in fig and not isinstance(fig[key], dict)}
+    if not base and not own:
+        return None, None, None
+    bins = list(own.get("bins", base.get("bins", [])))
+    n = len(bins) + 1
+    if "colors" in own:
+        colors = list(own["colors"])
+    elif "cmap" in own or ("cmap" in base and "colors" not in base):
+        colors = _sample_cmap(own.get("cmap", base.get("cmap")), n)
+    else:
+        colors = list(base.get("colors", []))
+    if len(colors) != n:
+        raise ValueError(f"{figure}: {len(bins)} 个断点需要 {n} 个颜色, 实际 {len(colors)} 个")
+    if "labels" in own:
+        labels = list(own["labels"])
+    elif "labels" in base and "bins" not in own:
+        labels = list(base["labels"])
+    else:
+        labels = default_labels(bins)
+    return bins, colors, labels
+
+
+def compile_figure(figure, variant=None, path=None):
+    """编译 figures.<figure> (可选变体) 为 FigureStyle"""
+    path = spec_path(path)
+    spec = load_spec(path)
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns, figure, variant)
+    if key in _STYLES:
+        return _STYLES[key]
+
+    figures = spec.get("figures", {})
+    if figure not in figures:
+        raise KeyError(f"{path} 中没有图 {figure!r}, 可选 {list(figures)}")
+    fig = {k: v for k, v in figures[figure].items() if k != "variants"}
+    if variant is not None:
+        variants = figures[figure].get("variants", {})
+        if variant not in variants:
+            raise KeyError(f"{figure} 没有变体 {variant!r}, 可选 {list(variants)}")
+        fig = _merge(fig, variants[variant])
+
+    rc = dict(spec.get("rc", {}).get(fig["rc"], {})) if "rc" in fig else {}
+    rc.update(fig.get("rc_params", {}))
+    bins, colors, labels = _compile_classes(spec, fig, figure)
+    cmap = norm = None
+    if bins is not None:
+        from matplotlib.colors import BoundaryNorm, ListedColormap
+        cmap = ListedColormap(colors)
+        # 原始数值 -> 颜色 (colorbar / 瓦片用); 绘图时仍按 pvplot.classify 的右闭区间分级
+        norm = BoundaryNorm(bins, len(colors), extend="both")
+    named = fig.get("colors", {})
+    style = FigureStyle(
+        name=figure, variant=variant, rc=rc, width_mm=fig["width_mm"], aspect=fig["aspect"],
+        bins=bins, colors=colors, labels=labels, cmap=cmap, norm=norm,
+        named_colors=named if isinstance(named, dict) else {}, layout=fig.get("layout", {}),
+    )
+    _STYLES[key] = style
+    return style
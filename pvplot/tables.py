@@ -0,0 +1,104 @@
+"""
+Excel 表格的列式缓存
+
+每个工作簿只用 openpyxl 解析一次: 所有工作表经列名标准化后写成 Parquet,
+按 (文件内容哈希, 标准化方式) 缓存在 .cache/pvplot/tables 下 (哈希按 mtime 记忆,
+文件未改动时不重读)。之后按需只读取用到的列。
+"""
+import json
+import os
+
+from pvplot.cache import cache_path, file_digest, make_key
+from pvplot.lazy import lazy_import
+
+pd = lazy_import("pandas")
+pq = lazy_import("pyarrow.parquet")
+
+TABLE_VERSION = 1
+
+# SolarDistributedAll.xlsx 没有国家前缀, 统一为 "Global 集中式" / "Global 分布式"
+GLOBAL_COLUMNS = {"集中式装机": "Global 集中式", "分布式": "Global 分布式"}
+
+
+def normalize_nation_sheet(df):
+    """barchartFig1.xlsx: 列名 strip + capitalize, 国家名首字母大写 (BRAZIL -> Brazil)"""
+    df.columns = [str(c).strip().capitalize() for c in df.columns]
+    df["Nation"] = df["Nation"].str.title()
+    return df
+
+
+def normalize_distribution_sheet(df):
+    """SolarDistributed*.xlsx: 列名 strip, 去掉 '光照' 非数值的行 (如末尾的 "总计")"""
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.rename(columns=GLOBAL_COLUMNS)
+    if "光照" in df.columns:
+        df["光照"] = pd.to_numeric(df["光照"], errors="coerce")
+        df = df.dropna(subset=["光照"])
+        df["光照"] = df["光照"].astype("int64")
+    for col in df.columns:
+        if col != "光照" and df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.reset_index(drop=True)
+
+
+NORMALIZERS = {
+    None: lambda df: df,
+    "nation": normalize_nation_sheet,
+    "distribution": normalize_distribution_sheet,
+}
+
+
+def _table_dir(path, normalize):
+    if normalize not in NORMALIZERS:
+        raise ValueError(f"未知的标准化方式: {normalize}, 可选 {list(NORMALIZERS)}")
+    key = make_key("table", file_digest(path), normalize, TABLE_VERSION)
+    return os.path.dirname(cache_path("tables", key, "sheets.json"))
+
+
+def _convert(path, normalize, table_dir):
+    """解析整个工作簿一次, 每个工作表写一个 Parquet 文件"""
+    sheets = pd.read_excel(path, sheet_name=None)
+    names = list(sheets)
+    for i, name in enumerate(names):
+        df = NORMALIZERS[normalize](sheets[name])
+        # 混合类型的文本列统一为字符串, 保证可写入 Parquet
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].astype("string")
+        df.to_parquet(os.path.join(table_dir, f"{i}.parquet"), index=False)
+    tmp = os.path.join(table_dir, "sheets.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(names, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(table_dir, "sheets.json"))
+    return names
+
+
+def _sheet_file(path, sheet, normalize):
+    table_dir = _table_dir(path, normalize)
+    manifest = os.path.join(table_dir, "sheets.json")
+    if os.path.exists(manifest):
+        with open(manifest, encoding="utf-8") as f:
+            names = json.load(f)
+    else:
+        names = _convert(path, normalize, table_dir)
+
+    if isinstance(sheet, int):
+        index = sheet
+    elif sheet in names:
+        index = names.index(sheet)
+    else:
+        raise ValueError(f"工作表未找到: {sheet}, 可选 {names}")
+    return os.path.join(table_dir, f"{index}.parquet")
+
+
+def sheet_columns(path, sheet=0, normalize=None):
+    """工作表 (标准化后) 的列名, 只读 Parquet 元数据"""
+    return pq.read_schema(_sheet_file(path, sheet, normalize)).names
+
+
+def read_sheet(path, sheet=0, columns=None, normalize=None):
+    """
+    读取一个工作表 (名称或序号); columns 给出时只读取这些列
+    normalize: None / "nation" / "distribution", 在首次转换时应用
+    """
+    return pd.read_parquet(_sheet_file(path, sheet, normalize), columns=columns)
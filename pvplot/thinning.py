@@ -0,0 +1,40 @@
+"""
+按输出像素网格抽稀散点: 每个屏幕像素只保留一个代表点 (格内权重最大者),
+可选返回格内权重之和; 稀疏区域的点全部保留, 密集区域不再重叠绘制,
+替代 sample(n=...) 的随机抽样
+"""
+import numpy as np
+
+
+def pixel_cells(x, y, extent, width_px):
+    """点所在的像素格编号, 像素边长 = 范围宽度 / width_px; 范围外为 -1"""
+    xmin, xmax, ymin, ymax = extent
+    size = (xmax - xmin) / width_px
+    ny = max(1, int(np.ceil((ymax - ymin) / size)))
+    ix = np.floor((np.asarray(x, float) - xmin) / size).astype(np.int64)
+    iy = np.floor((np.asarray(y, float) - ymin) / size).astype(np.int64)
+    inside = (ix >= 0) & (ix < width_px) & (iy >= 0) & (iy < ny)
+    return np.where(inside, ix * ny + iy, -1)
+
+
+def thin_points(x, y, extent, width_px, weights=None, return_sums=False):
+    """
+    返回保留点的下标 (按原顺序); return_sums=True 时同时返回每个保留点所在格的权重和
+    extent = (xmin, xmax, ymin, ymax), width_px 取目标 DPI 下的图宽像素数
+    (轴实际宽度小于整图, 因此按整图宽度划格只会多保留点, 不会丢失可见细节)
+    """
+    cells = pixel_cells(x, y, extent, width_px)
+    candidates = np.flatnonzero(cells >= 0)
+    cells = cells[candidates]
+    w = np.zeros(len(candidates)) if weights is None else np.asarray(weights, float)[candidates]
+
+    # 格内按权重降序, 取每格第一个
+    order = np.lexsort((-np.nan_to_num(w, nan=-np.inf), cells))
+    _, first, inverse = np.unique(cells[order], return_index=True, return_inverse=True)
+    rep = candidates[order[first]]          # 每格代表点, 按格编号排列
+    by_position = np.argsort(rep)
+    keep = rep[by_position]
+    if not return_sums:
+        return keep
+    sums = np.bincount(inverse, weights=np.nan_to_num(w[order]))
+    return keep, sums[by_position]
@@ -0,0 +1,222 @@
+"""
+全球图的 z/x/y PNG 瓦片金字塔 (Robinson 或 Web Mercator), 供本地交互缩放浏览
+
+最高级别按像元稀疏统计 (像元编号 + 求和 + 计数), 每个较低级别由下一级 2x2 合并得到,
+不再回到原始网格; 只有含数据的瓦片会被渲染 (海洋等空白瓦片直接跳过), 瓦片在进程池中并行绘制。
+"""
+import json
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from pvplot.data import SOLAR_BBOX, TARGET_CRS, load_points, load_solar
+from pvplot.parallel import run_jobs
+from pvplot.raster import cached_index, take
+
+TILE_SIZE = 256
+
+# 方案 -> (CRS, 正方形瓦片范围的半宽, 光伏图层裁剪范围)
+SCHEMES = {
+    "robinson": (TARGET_CRS, 17005833.33052523, SOLAR_BBOX),
+    # Web Mercator 只覆盖到 ±85.0511°
+    "webmercator": ("EPSG:3857", 20037508.342789244, (-180, -58, 180, 85.0511)),
+}
+
+# 聚合方式: mean 为像元内平均 (光照), density 为单位面积总量 (装机面积 / km²)
+HOW = ["mean", "density"]
+
+
+class Level(NamedTuple):
+    """一个缩放级别的稀疏像元统计; 像元编号 = 行 * n + 列, 行自上而下"""
+    zoom: int
+    half: float
+    ids: np.ndarray
+    sums: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def n(self):
+        return TILE_SIZE << self.zoom
+
+    @property
+    def pixel_km2(self):
+        return (2 * self.half / self.n) ** 2 / 1e6
+
+
+def load_scheme_layer(scheme, shp_path=None, scaled=False, points=False):
+    """按瓦片方案的 CRS 读取 (或从缓存加载) 光伏网格; points=True 时只取质心 (见 load_points)"""
+    crs, _, bbox = SCHEMES[scheme]
+    kwargs = {"shp_path": shp_path} if shp_path else {}
+    return (load_points if points else load_solar)(bbox, crs, scaled=scaled, **kwargs)
+
+
+def _group(ids, values):
+    ids, inverse = np.unique(ids, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(ids))
+    counts = np.bincount(inverse, minlength=len(ids))
+    return ids, sums, counts
+
+
+def level_from_points(x, y, values, zoom, half):
+    """按质心把字段值累加到最高级别的像元 (NaN 与范围外的点忽略)"""
+    n = TILE_SIZE << zoom
+    size = 2 * half / n
+    values = np.asarray(values, float)
+    col = np.floor((np.asarray(x, float) + half) / size).astype(np.int64)
+    row = np.floor((half - np.asarray(y, float)) / size).astype(np.int64)
+    ok = (col >= 0) & (col < n) & (row >= 0) & (row < n) & ~np.isnan(values)
+    return Level(zoom, half, *_group(row[ok] * n + col[ok], values[ok]))
+
+
+def level_from_polygons(gdf, values, zoom, half):
+    """
+    把网格多边形烧录到最高级别的像元 (pvplot.raster 的行号栅格, 按图层缓存),
+    只烧录图层范围所覆盖的像元行列
+    """
+    n = TILE_SIZE << zoom
+    size = 2 * half / n
+    minx, miny, maxx, maxy = gdf.total_bounds
+    c0 = max(0, int(np.floor((minx + half) / size)))
+    c1 = min(n, int(np.ceil((maxx + half) / size)))
+    r0 = max(0, int(np.floor((half - maxy) / size)))
+    r1 = min(n, int(np.ceil((half - miny) / size)))
+    extent = (-half + c0 * size, -half + c1 * size, half - r1 * size, half - r0 * size)
+    index, _ = cached_index(gdf, c1 - c0, extent)
+
+    # 行号栅格自下而上, 瓦片行自上而下
+    vals = take(index, values)[::-1]
+    rows, cols = np.nonzero(~np.isnan(vals))
+    ids = (rows + r0).astype(np.int64) * n + (cols + c0)
+    return Level(zoom, half, ids, vals[rows, cols], np.ones(len(ids), dtype=np.int64))
+
+
+def coarsen(level):
+    """2x2 像元合并为上一级 (求和与计数直接相加)"""
+    n = level.n
+    row, col = np.divmod(level.ids, n)
+    ids = (row // 2) * (n // 2) + col // 2
+    ids, inverse = np.unique(ids, return_inverse=True)
+    sums = np.bincount(inverse, weights=level.sums, minlength=len(ids))
+    counts = np.bincount(inverse, weights=level.counts, minlength=len(ids)).astype(np.int64)
+    return Level(level.zoom - 1, level.half, ids, sums, counts)
+
+
+def pyramid(level, min_zoom=0):
+    """由最高级别逐级合并, 返回 {zoom: Level}"""
+    levels = {level.zoom: level}
+    while level.zoom > min_zoom:
+        level = coarsen(level)
+        levels[level.zoom] = level
+    return levels
+
+
+def level_values(level, how):
+    if how == "mean":
+        return level.sums / level.counts
+    if how == "density":
+        return level.sums / level.pixel_km2
+    raise ValueError(f"未知的聚合方式: {how}, 可选 {HOW}")
+
+
+def _tile_slices(level):
+    """按瓦片分组的像元顺序, 以及每个非空瓦片 (tx, ty) 的 [start, stop)"""
+    row, col = np.divmod(level.ids, level.n)
+    ntiles = 1 << level.zoom
+    tile = (row // TILE_SIZE) * ntiles + col // TILE_SIZE
+    order = np.argsort(tile, kind="stable")
+    keys, starts = np.unique(tile[order], return_index=True)
+    stops = np.append(starts[1:], len(order))
+    return order, [(int(k % ntiles), int(k // ntiles), int(a), int(b))
+                   for k, a, b in zip(keys, starts, stops)]
+
+
+def _render_column(shared, job):
+    """进程池任务: 绘制同一列 (相同 x) 的所有非空瓦片并写出 PNG"""
+    from PIL import Image
+
+    name, zoom, tx, tiles = job
+    level = shared["layers"][name]["levels"][zoom]
+    order, colors = shared["orders"][(name, zoom)]
+
+    folder = os.path.join(shared["out_dir"], name, str(zoom), str(tx))
+    os.makedirs(folder, exist_ok=True)
+    for ty, start, stop in tiles:
+        sel = order[start:stop]
+        row, col = np.divmod(level.ids[sel], level.n)
+        img = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        img[row - ty * TILE_SIZE, col - tx * TILE_SIZE] = colors[sel]
+        Image.fromarray(img, "RGBA").save(os.path.join(folder, f"{ty}.png"))
+    return len(tiles)
+
+
+def export_tiles(out_dir, layers, workers=None):
+    """
+    layers: {名称: {"levels": {zoom: Level}, "how": "mean"/"density", "cmap", "norm"}}
+    写出 out_dir/<名称>/<z>/<x>/<y>.png, 返回 {名称: 瓦片数}
+    """
+    orders, jobs = {}, []
+    for name, spec in layers.items():
+        for zoom, level in sorted(spec["levels"].items()):
+            order, tiles = _tile_slices(level)
+            # 整个级别一次着色, 子进程只按瓦片切片
+            colors = spec["cmap"](spec["norm"](level_values(level, spec["how"])), bytes=True)
+            orders[(name, zoom)] = (order, colors)
+            columns = {}
+            for tx, ty, start, stop in tiles:
+                columns.setdefault(tx, []).append((ty, start, stop))
+            jobs.extend((name, zoom, tx, column) for tx, column in columns.items())
+
+    shared_data = {"layers": layers, "orders": orders, "out_dir": out_dir}
+    written = run_jobs(_render_column, jobs, shared_data, workers=workers,
+                       label=lambda job: f"{job[0]}/{job[1]}/{job[2]}")
+    counts = {name: 0 for name in layers}
+    for job, n in zip(jobs, written):
+        counts[job[0]] += n
+    return counts
+
+
+_VIEWER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>PVplotHub tiles</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map {{ height: 100%; margin: 0; background: #fff; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+const layers = {layers};
+const maxZoom = {max_zoom};
+const mercator = {mercator};
+const map = L.map("map", mercator ? {{}} : {{crs: L.CRS.Simple}});
+const overlays = {{}};
+layers.forEach((name, i) => {{
+  overlays[name] = L.tileLayer(name + "/{{z}}/{{x}}/{{y}}.png",
+    {{minZoom: 0, maxZoom: maxZoom + 2, maxNativeZoom: maxZoom, noWrap: true}});
+  if (i === 0) overlays[name].addTo(map);
+}});
+if (mercator) {{
+  L.tileLayer("https://tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png",
+    {{attribution: "&copy; OpenStreetMap", opacity: 0.4}}).addTo(map).bringToBack();
+  map.setView([20, 0], 2);
+}} else {{
+  map.fitBounds([[-{tile}, 0], [0, {tile}]]);
+}}
+L.control.layers(null, overlays, {{collapsed: false}}).addTo(map);
+</script>
+</body>
+</html>
+"""
+
+
+def write_viewer(out_dir, names, max_zoom, scheme="robinson"):
+    """写出基于 Leaflet 的简易浏览页 (Robinson 用平面坐标, Web Mercator 叠加 OSM 底图)"""
+    path = os.path.join(out_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_VIEWER.format(layers=json.dumps(list(names)), max_zoom=max_zoom,
+                               mercator="true" if scheme == "webmercator" else "false",
+                               tile=TILE_SIZE))
+    return path